@@ -0,0 +1,160 @@
+import argparse
+import os
+import sys
+import time
+from collections import namedtuple
+from itertools import islice
+from PuzzleIO import open_puzzle_file, read_puzzles
+from Solver import SudokuSolver
+from Template import grid_to_puzzle, puzzle_to_grid, sudoku_csp
+
+# Solvers solve_many can fan out: the SudokuSolver backends, or the generic
+# CSP engine (bitmask domains, forward checking)
+SOLVERS = ("auto", "propagation", "dlx", "csp")
+
+# One solved puzzle: its position in the input, the puzzle string, the solution
+# string (None if unsolvable or unreadable), the time the solve took in seconds
+# and, for a puzzle that could not be read, the error message
+SolveResult = namedtuple(
+    "SolveResult", ["index", "puzzle", "solution", "seconds", "error"], defaults=(None,)
+)
+
+
+# Solve one puzzle string with the chosen solver; returns the solution string
+def solve_puzzle(puzzle, solver="auto"):
+    grid = puzzle_to_grid(puzzle)
+    if solver == "csp":
+        csp = sudoku_csp(grid, domain_store="bitmask")
+        solution = csp.solve(inference="forward_checking")
+        if solution is None:
+            return None
+        return grid_to_puzzle(
+            [[solution[(i, j)] for j in range(len(grid))] for i in range(len(grid))]
+        )
+    solution = SudokuSolver(solver).solve(grid)
+    return None if solution is None else grid_to_puzzle(solution)
+
+
+# Worker entry point: solve a chunk of (index, puzzle) pairs, timing each one.
+# A malformed puzzle gets a result carrying its error instead of failing the
+# whole chunk.
+def solve_chunk(chunk, solver):
+    results = []
+    for index, puzzle in chunk:
+        start_time = time.perf_counter()
+        try:
+            solution, error = solve_puzzle(puzzle, solver), None
+        except ValueError as exception:
+            solution, error = None, str(exception)
+        results.append(
+            SolveResult(
+                index, puzzle, solution, time.perf_counter() - start_time, error
+            )
+        )
+    return results
+
+
+# Split an iterable of puzzles into lists of (index, puzzle) pairs, lazily
+def chunked(puzzles, chunksize):
+    numbered = enumerate(puzzle.strip() for puzzle in puzzles)
+    while True:
+        chunk = list(islice(numbered, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+# Solve an iterable of 81-character puzzle strings across a process pool,
+# yielding a SolveResult per puzzle. Results come in input order when ordered
+# is True, otherwise as soon as their chunk completes. Only a bounded number of
+# chunks is in flight at once, so the input may be an arbitrarily long stream.
+# workers=0 solves in this process; workers=None uses every core.
+def solve_many(grids, workers=None, chunksize=64, ordered=True, solver="auto"):
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver: {solver}")
+    chunks = chunked(grids, chunksize)
+    if workers == 0:
+        for chunk in chunks:
+            yield from solve_chunk(chunk, solver)
+        return
+
+    # Only loaded for a pool: it is most of the cost of importing this module
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    workers = workers or os.cpu_count() or 1
+    window = workers * 2  # Chunks read but not yet yielded, at most
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = {}  # Future -> chunk sequence number
+        finished = {}  # Chunk sequence number -> results, waiting for their turn
+        next_chunk = 0  # Chunks yielded so far
+        submitted = 0
+        while True:
+            # Keep the pool busy, counting results held back behind a slow
+            # chunk toward the window so they cannot pile up
+            while submitted - next_chunk < window:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                pending[executor.submit(solve_chunk, chunk, solver)] = submitted
+                submitted += 1
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                sequence = pending.pop(future)
+                if ordered:
+                    finished[sequence] = future.result()
+                else:
+                    yield from future.result()
+                    next_chunk += 1
+            while next_chunk in finished:
+                yield from finished.pop(next_chunk)
+                next_chunk += 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Solve one-puzzle-per-line Sudoku files in parallel."
+    )
+    parser.add_argument("input", help="puzzle file (.gz allowed), or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="output file or -")
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument("--chunksize", type=int, default=64)
+    parser.add_argument("--solver", choices=SOLVERS, default="auto")
+    parser.add_argument(
+        "--unordered", action="store_true", help="emit results as they complete"
+    )
+    args = parser.parse_args(argv)
+
+    # Both ends stream, so memory stays flat however long the file is
+    puzzles = read_puzzles(args.input)
+    target = open_puzzle_file(args.output, "w")
+    start_time = time.perf_counter()
+    count = 0
+    errors = 0
+    try:
+        for result in solve_many(
+            puzzles, args.workers, args.chunksize, not args.unordered, args.solver
+        ):
+            if result.error is not None:
+                errors += 1
+                print(f"puzzle {result.index}: {result.error}", file=sys.stderr)
+            target.write(
+                f"{result.index},{result.puzzle},{result.solution or ''},"
+                f"{result.seconds * 1000:.3f}\n"
+            )
+            count += 1
+    finally:
+        if target is not sys.stdout:
+            target.close()
+    elapsed = time.perf_counter() - start_time
+    print(
+        f"Solved {count} puzzles in {elapsed:.2f} s "
+        f"({count / elapsed if elapsed else 0:.1f} puzzles/s)"
+        + (f", {errors} unreadable" if errors else ""),
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,657 @@
+import hashlib
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from collections import deque
+from Cache import Transform, apply_transform
+from Constraints import AllDifferent, Sum
+from CSP import ARC_ALGORITHMS, CSP, INFERENCE_MODES, VALUE_ORDERINGS
+from Generator import COMPLETE_METHODS, SudokuGenerator
+from Solver import BACKENDS, SolveTimeout, SudokuSolver
+from Stats import SolveStats
+from Template import MODELS, box_of, grid_to_puzzle, puzzle_to_grid, sudoku_template
+
+# Default board shown by GUI.solve_sudoku (kept here so the benchmark stays headless)
+DEFAULT_GRID = [
+    [5, 3, 0, 0, 7, 0, 0, 0, 0],
+    [6, 0, 0, 1, 9, 5, 0, 0, 0],
+    [0, 9, 8, 0, 0, 0, 0, 6, 0],
+    [8, 0, 0, 0, 6, 0, 0, 0, 3],
+    [4, 0, 0, 8, 0, 3, 0, 0, 1],
+    [7, 0, 0, 0, 2, 0, 0, 0, 6],
+    [0, 6, 0, 0, 0, 0, 2, 8, 0],
+    [0, 0, 0, 4, 1, 9, 0, 0, 5],
+    [0, 0, 0, 0, 8, 0, 0, 7, 9],
+]
+
+
+# Harder boards, as 81-character strings read row by row with 0 for empty cells
+PUZZLES = {
+    "ai_escargot": "100007090030020008009600500005300900010080002600004000300000010040000007007000300",
+    "17_clue": "000000010400000000020000000000050407008000300001090000300400200050100000000806000",
+}
+
+
+class ScanCSP(CSP):
+    # Reference implementation that scans the whole constraint list on every
+    # lookup, as CSP did before the neighbor index was introduced
+    def is_consistent(self, variable, value, assignment):
+        for var_i, var_j in self.constraints:
+            if var_i == variable:
+                if var_j in assignment and assignment[var_j] == value:
+                    return False
+            elif var_j == variable:
+                if var_i in assignment and assignment[var_i] == value:
+                    return False
+        return True
+
+    def revise(self, constraint, trail=None):
+        revised = False
+        var_i, var_j = constraint
+        for value_i in set(self.domains[var_i]):
+            if all(
+                not self.is_consistent(var_i, value_i, {var_j: value_j})
+                for value_j in self.domains[var_j]
+            ):
+                self.domains[var_i] = [
+                    value for value in self.domains[var_i] if value != value_i
+                ]
+                revised = True
+        return revised
+
+    def get_neighbors(self, variable):
+        return [var_j for var_i, var_j in self.constraints if var_i == variable]
+
+    def order_domain_values(self, variable, assignment):
+        def count_conflicts(value):
+            conflicts = 0
+            for neighbor in self.get_neighbors(variable):
+                if neighbor not in assignment:
+                    for neighbor_value in self.domains[neighbor]:
+                        if not self.is_consistent(
+                            neighbor, neighbor_value, {variable: value}
+                        ):
+                            conflicts += 1
+            return conflicts
+
+        return sorted(self.domains[variable], key=count_conflicts)
+
+
+class QueueCSP(CSP):
+    # Reference AC-3 as it was before queue deduplication and the singleton
+    # short-circuit: every revised arc re-queues all its neighbor arcs, and
+    # revise compares every pair of values (pending typed constraints are
+    # not supported and ignored)
+    def arc_consistency(self, queue=None, trail=None, pending=None):
+        queue = deque(self.constraints if queue is None else queue)
+        while queue:
+            constraint = queue.popleft()
+            if self.revise(constraint, trail):
+                if self.domains.size(constraint[0]) == 0:
+                    return False
+                for neighbor in self.get_neighbors(constraint[0]):
+                    queue.append((neighbor, constraint[0]))
+        return True
+
+    def revise(self, constraint, trail=None):
+        var_i, var_j = constraint
+        if var_j not in self.neighbors[var_i]:
+            return False
+        original_domain_i = self.domains.snapshot(var_i)
+        revised = False
+        for value_i in list(self.domains.values_of(var_i)):
+            if all(value_j == value_i for value_j in self.domains.values_of(var_j)):
+                self.domains.remove(var_i, value_i)
+                revised = True
+        if revised and trail is not None:
+            trail.append((var_i, original_domain_i))
+        return revised
+
+
+# Build the Sudoku CSP for a grid from the shared template
+def build_sudoku_csp(grid, csp_class=CSP, **options):
+    template = sudoku_template(box_of(grid))
+    if csp_class is CSP:
+        return template.csp(grid, **options)
+    return csp_class(
+        template.variables, template.domains(grid), template.constraints, **options
+    )
+
+
+# The constraint comprehension every caller ran before the shared template
+def build_constraints_inline():
+    return [
+        ((var_i_row, var_i_col), (var_j_row, var_j_col))
+        for var_i_row in range(9)
+        for var_i_col in range(9)
+        for var_j_row in range(9)
+        for var_j_col in range(9)
+        if (var_i_row != var_j_row or var_i_col != var_j_col)
+        and (
+            var_i_row == var_j_row
+            or var_i_col == var_j_col
+            or (var_i_row // 3 == var_j_row // 3 and var_i_col // 3 == var_j_col // 3)
+        )
+    ]
+
+
+# Time a single solve of grid, returning (seconds, solved)
+def time_solve(grid, csp_class=CSP, inference="none", **options):
+    csp = build_sudoku_csp(grid, csp_class, **options)
+    start_time = time.perf_counter()
+    solution = csp.solve(inference=inference)
+    end_time = time.perf_counter()
+    return end_time - start_time, solution is not None, csp.nodes_expanded
+
+
+def bench_neighbor_index(repeat=3):
+    scan_time = min(time_solve(DEFAULT_GRID, ScanCSP)[0] for _ in range(repeat))
+    indexed_time = min(time_solve(DEFAULT_GRID, CSP)[0] for _ in range(repeat))
+    print("Constraint scan: ", round(scan_time * 1000, 2), " ms")
+    print("Neighbor index:  ", round(indexed_time * 1000, 2), " ms")
+    print("Speedup:         ", round(scan_time / indexed_time, 1), "x")
+
+
+def bench_domain_stores(repeat=3):
+    for store in ("list", "bitmask"):
+        best = min(
+            time_solve(DEFAULT_GRID, domain_store=store)[0] for _ in range(repeat)
+        )
+        print(f"{store:8s} domains: ", round(best * 1000, 2), " ms")
+
+
+# Per-call cost of building a Sudoku CSP inline versus from the shared template
+def bench_construction(repeat=50):
+    variables = [(i, j) for i in range(9) for j in range(9)]
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        CSP(
+            variables,
+            {var: list(range(1, 10)) for var in variables},
+            build_constraints_inline(),
+        )
+    inline_time = (time.perf_counter() - start_time) / repeat
+    sudoku_template()  # Exclude the one-off template build
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        build_sudoku_csp(DEFAULT_GRID)
+    template_time = (time.perf_counter() - start_time) / repeat
+    print("Inline construction:   ", round(inline_time * 1000, 3), " ms")
+    print("Template construction: ", round(template_time * 1000, 3), " ms")
+
+
+# Nodes expanded and wall time of every inference mode, per puzzle
+def bench_inference(domain_store="bitmask"):
+    grids = {"default": DEFAULT_GRID}
+    grids.update((name, puzzle_to_grid(puzzle)) for name, puzzle in PUZZLES.items())
+    for name, grid in grids.items():
+        for inference in INFERENCE_MODES:
+            seconds, solved, nodes = time_solve(
+                grid, inference=inference, domain_store=domain_store
+            )
+            print(
+                f"{name:12s} {inference:16s} nodes: {nodes:8d}  "
+                f"time: {seconds * 1000:10.2f} ms  solved: {solved}"
+            )
+
+
+# The initial arc consistency pass and a full MAC solve per puzzle, with the
+# old AC-3 against the deduplicated AC-3 and AC-2001, best of repeat
+def bench_arc_consistency(domain_store="list", repeat=3):
+    grids = {"default": DEFAULT_GRID}
+    grids.update((name, puzzle_to_grid(puzzle)) for name, puzzle in PUZZLES.items())
+    variants = [("old ac3", QueueCSP, "ac3")]
+    variants += [(algorithm, CSP, algorithm) for algorithm in ARC_ALGORITHMS]
+    for name, grid in grids.items():
+        for label, csp_class, algorithm in variants:
+            initial, solve = float("inf"), float("inf")
+            for _ in range(repeat):
+                csp = build_sudoku_csp(
+                    grid, csp_class, domain_store=domain_store, arc_algorithm=algorithm
+                )
+                start_time = time.perf_counter()
+                csp.arc_consistency()
+                initial = min(initial, time.perf_counter() - start_time)
+                solve = min(
+                    solve,
+                    time_solve(
+                        grid,
+                        csp_class,
+                        inference="mac",
+                        domain_store=domain_store,
+                        arc_algorithm=algorithm,
+                    )[0],
+                )
+            print(
+                f"{name:12s} {label:8s} initial AC: {initial * 1000:8.2f} ms  "
+                f"MAC solve: {solve * 1000:9.2f} ms"
+            )
+
+
+# Solve time and nodes with LCV against static value ordering, best of
+# repeat. LCV can only pay for the time it spends ordering by saving nodes.
+def bench_value_ordering(repeat=3):
+    grids = {"default": DEFAULT_GRID}
+    grids.update((name, puzzle_to_grid(puzzle)) for name, puzzle in PUZZLES.items())
+    for inference in ("forward_checking", "mac"):
+        for domain_store in ("list", "bitmask"):
+            for name, grid in grids.items():
+                for ordering in VALUE_ORDERINGS:
+                    best, nodes = float("inf"), 0
+                    for _ in range(repeat):
+                        seconds, _, nodes = time_solve(
+                            grid,
+                            CSP,
+                            inference=inference,
+                            domain_store=domain_store,
+                            value_ordering=ordering,
+                        )
+                        best = min(best, seconds)
+                    print(
+                        f"{inference:16s} {domain_store:7s} {name:12s} {ordering:6s} "
+                        f"nodes: {nodes:6d}  time: {best * 1000:9.2f} ms"
+                    )
+
+
+# Counters and phase timings of an instrumented solve, and what the
+# instrumentation costs over an uninstrumented one
+def bench_stats(inference="forward_checking", domain_store="bitmask"):
+    plain_time = time_solve(
+        DEFAULT_GRID, inference=inference, domain_store=domain_store
+    )[0]
+    stats = SolveStats()
+    csp = build_sudoku_csp(DEFAULT_GRID, domain_store=domain_store, stats=stats)
+    csp.solve(inference=inference)
+    for name, value in stats.as_dict().items():
+        if name == "timings":
+            for phase, seconds in value.items():
+                print(f"  {phase:12s} {seconds * 1000:10.2f} ms")
+        else:
+            print(f"{name:14s} {value}")
+    print("Uninstrumented: ", round(plain_time * 1000, 2), " ms")
+
+
+# Per-solve time of the dedicated SudokuSolver backends, best of repeat
+def bench_solver_backends(repeat=5):
+    grids = {"default": DEFAULT_GRID}
+    grids.update((name, puzzle_to_grid(puzzle)) for name, puzzle in PUZZLES.items())
+    for backend in ("propagation", "dlx"):
+        solver = SudokuSolver(backend)
+        for name, grid in grids.items():
+            best = float("inf")
+            for _ in range(repeat):
+                start_time = time.perf_counter()
+                solver.solve(grid)
+                best = min(best, time.perf_counter() - start_time)
+            print(
+                f"{backend:12s} {name:12s} nodes: {solver.nodes:6d}  "
+                f"time: {best * 1000:8.3f} ms"
+            )
+
+
+# Complete grids per second for each generator method, with a fixed seed
+def bench_complete_grids(count=1000, seed=0):
+    for method in COMPLETE_METHODS:
+        generator = SudokuGenerator(seed)
+        start_time = time.perf_counter()
+        for _ in range(count):
+            generator.generate_complete_puzzle(method)
+        elapsed = time.perf_counter() - start_time
+        print(f"{method:10s} complete grids: {count / elapsed:10.1f} per second")
+
+
+# Generate a puzzle per box size (9x9, 16x16, 25x25) with a fixed seed and
+# time every solver on it, giving up after timeout seconds. The CSP engine is
+# run in slices of steps so it can be stopped the same way; its arc count
+# grows with the square of the grid size, so only up to 16x16.
+def bench_sizes(boxes=(3, 4, 5), seed=0, timeout=30.0):
+    for box in boxes:
+        size = box * box
+        generator = SudokuGenerator(seed, box)
+        start_time = time.perf_counter()
+        puzzle = generator.generate_puzzle()
+        elapsed = time.perf_counter() - start_time
+        print(
+            f"{size}x{size}: generated in {elapsed:.2f} s with "
+            f"{int((puzzle != 0).sum())} clues"
+        )
+        for backend in BACKENDS:
+            solver = SudokuSolver(backend)
+            start_time = time.perf_counter()
+            try:
+                solver.solve(puzzle, timeout=timeout)
+                result = f"{(time.perf_counter() - start_time) * 1000:10.2f} ms"
+            except SolveTimeout:
+                result = f"gave up after {timeout:g} s"
+            print(f"  {backend:16s} nodes: {solver.nodes:8d}  {result}")
+        if box <= 4:
+            csp = build_sudoku_csp(puzzle, domain_store="bitmask")
+            start_time = time.perf_counter()
+            search = csp.search(inference="forward_checking")
+            solution = None
+            if csp.arc_consistency():
+                while solution is None and not search.done:
+                    if time.perf_counter() - start_time > timeout:
+                        break
+                    solution = search.run(max_steps=1000)
+            gave_up = solution is None and not search.done
+            search.close()
+            if gave_up:
+                result = f"gave up after {timeout:g} s"
+            else:
+                result = f"{(time.perf_counter() - start_time) * 1000:10.2f} ms"
+            print(f"  {'csp':16s} nodes: {csp.nodes_expanded:8d}  {result}")
+
+
+# Killer Sudoku cages over a solved 9x9 grid: the cells are split into
+# connected groups of 2 to largest cells with no digit repeated, each with the
+# sum of its digits. Returns [(cells, total)].
+def killer_cages(solution, seed=0, largest=4):
+    rng = random.Random(seed)
+    cells = [(i, j) for i in range(9) for j in range(9)]
+    rng.shuffle(cells)
+    free = set(cells)
+    cages = []
+    for cell in cells:
+        if cell not in free:
+            continue
+        free.discard(cell)
+        cage = [cell]
+        target = rng.randint(2, largest)
+        while len(cage) < target:
+            digits = {solution[i][j] for i, j in cage}
+            options = [
+                (i + di, j + dj)
+                for i, j in cage
+                for di, dj in ((0, 1), (1, 0), (0, -1), (-1, 0))
+                if (i + di, j + dj) in free and solution[i + di][j + dj] not in digits
+            ]
+            if not options:
+                break
+            grown = rng.choice(options)
+            free.discard(grown)
+            cage.append(grown)
+        cages.append((cage, sum(solution[i][j] for i, j in cage)))
+    return cages
+
+
+# MAC solves with the Sudoku rules as 1,620 binary arcs against 27
+# AllDifferent constraints, then the diagonal and Killer variants, which only
+# the typed constraints can state without new arcs per variant
+def bench_constraint_models(domain_store="bitmask", seed=0):
+    template = sudoku_template(3)
+
+    def run(label, grid, model, extra=()):
+        csp = template.csp(grid, domain_store, model=model, extra=extra)
+        start_time = time.perf_counter()
+        solution = csp.solve(inference="mac")
+        elapsed = time.perf_counter() - start_time
+        print(
+            f"{label:24s} {model:6s} nodes: {csp.nodes_expanded:6d}  "
+            f"time: {elapsed * 1000:9.2f} ms  solved: {solution is not None}"
+        )
+
+    grids = {"default": DEFAULT_GRID}
+    grids.update((name, puzzle_to_grid(puzzle)) for name, puzzle in PUZZLES.items())
+    for name, grid in grids.items():
+        for model in MODELS:
+            run(name, grid, model)
+    diagonals = [AllDifferent(diagonal) for diagonal in template.diagonals()]
+    diagonal_arcs = [
+        (var_i, var_j)
+        for diagonal in template.diagonals()
+        for var_i in diagonal
+        for var_j in diagonal
+        if var_i != var_j
+    ]
+    run("diagonal (empty)", None, "arcs", diagonal_arcs)
+    run("diagonal (empty)", None, "units", diagonals)
+    solution = SudokuGenerator(seed).generate_complete_puzzle()
+    cages = []
+    for cells, total in killer_cages(solution, seed):
+        cages += [Sum(cells, total), AllDifferent(cells)]
+    run("killer (no givens)", None, "units", cages)
+
+
+# Format of the JSON written by run_suite; bumped when its layout changes
+SUITE_VERSION = 1
+# Solvers the suite times on every puzzle set, as name -> (kind, option):
+# the CSP engine per Sudoku model with MAC, and SudokuSolver per backend
+SUITE_SOLVERS = {
+    "csp-arcs": ("csp", "arcs"),
+    "csp-units": ("csp", "units"),
+    "propagation": ("solver", "propagation"),
+    "dlx": ("solver", "dlx"),
+}
+
+
+# The same grid under a random Sudoku symmetry drawn from rng
+def random_variant(grid, rng):
+    box = box_of(grid)
+    size = box * box
+    rows = [
+        box * band + r
+        for band in rng.sample(range(box), box)
+        for r in rng.sample(range(box), box)
+    ]
+    cols = [
+        box * stack + c
+        for stack in rng.sample(range(box), box)
+        for c in rng.sample(range(box), box)
+    ]
+    labels = dict(zip(range(1, size + 1), rng.sample(range(1, size + 1), size)))
+    return apply_transform(grid, Transform(rng.random() < 0.5, rows, cols, labels))
+
+
+# The fixed puzzle sets of the suite, as name -> list of puzzle strings. The
+# same seed always gives the same puzzles: "easy" and "hard" are generated in
+# those grader bands, "17_clue" are symmetric variants of the 17-clue puzzle,
+# and "unsolvable" are easy puzzles with one wrong given that breaks no rule
+# on its own, so only search can tell.
+def suite_puzzles(seed=0, count=10):
+    generator = SudokuGenerator(seed)
+    rng = random.Random(seed)
+    sets = {
+        "easy": [generator.generate_puzzle("easy") for _ in range(count)],
+        "hard": [generator.generate_puzzle("hard") for _ in range(count)],
+        "17_clue": [
+            random_variant(puzzle_to_grid(PUZZLES["17_clue"]), rng)
+            for _ in range(count)
+        ],
+    }
+    unsolvable = []
+    solver = SudokuSolver()
+    for puzzle in sets["easy"]:
+        puzzle = [[int(value) for value in row] for row in puzzle]
+        solution = solver.solve(puzzle)
+        # Wrong digits each empty cell's peers still allow; cells where only
+        # the right digit is left cannot take a wrong given
+        wrong = {}
+        for i in range(9):
+            for j in range(9):
+                if puzzle[i][j]:
+                    continue
+                taken = {puzzle[i][k] for k in range(9)}
+                taken |= {puzzle[k][j] for k in range(9)}
+                taken |= {
+                    puzzle[i // 3 * 3 + k // 3][j // 3 * 3 + k % 3] for k in range(9)
+                }
+                digits = [
+                    d for d in range(1, 10) if d != solution[i][j] and d not in taken
+                ]
+                if digits:
+                    wrong[(i, j)] = digits
+        i, j = rng.choice(sorted(wrong))
+        puzzle[i][j] = rng.choice(wrong[(i, j)])
+        unsolvable.append(puzzle)
+    sets["unsolvable"] = unsolvable
+    return {
+        name: [grid_to_puzzle(puzzle) for puzzle in puzzles]
+        for name, puzzles in sets.items()
+    }
+
+
+# Nearest-rank percentile of sorted values
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+# Latency percentiles in ms of a list of seconds
+def latency_summary(seconds):
+    seconds = sorted(seconds)
+    return {
+        "p50_ms": percentile(seconds, 0.5) * 1000,
+        "p90_ms": percentile(seconds, 0.9) * 1000,
+        "p99_ms": percentile(seconds, 0.99) * 1000,
+        "max_ms": seconds[-1] * 1000,
+        "mean_ms": sum(seconds) / len(seconds) * 1000,
+    }
+
+
+# Solve grid once with a SUITE_SOLVERS entry; returns (solution, nodes)
+def suite_solve(kind, option, grid):
+    if kind == "csp":
+        csp = sudoku_template(3).csp(grid, "bitmask", model=option)
+        return csp.solve(inference="mac"), csp.nodes_expanded
+    solver = SudokuSolver(option)
+    return solver.solve(grid), solver.nodes
+
+
+# Time solve(item) over items, best of repeat per item to damp noise, then
+# run them again under tracemalloc (which slows everything down, so it gets
+# its own pass) for the peak memory. solve returns (result, search nodes
+# taken), result None for a failure.
+def measure(solve, items, repeat=3):
+    seconds, nodes, solved = [], 0, 0
+    for item in items:
+        best = float("inf")
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            result, taken = solve(item)
+            best = min(best, time.perf_counter() - start_time)
+        seconds.append(best)
+        nodes += taken
+        solved += result is not None
+    tracemalloc.start()
+    try:
+        for item in items:
+            solve(item)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    summary = latency_summary(seconds)
+    summary.update(
+        solved=solved,
+        nodes=nodes,
+        nodes_per_second=nodes / sum(seconds) if sum(seconds) else 0.0,
+        peak_kib=peak / 1024,
+    )
+    return summary
+
+
+# Run every suite solver over every puzzle set, and time the generator
+# producing count puzzles from seed. Returns the JSON-ready results; the
+# puzzle sets are fingerprinted so results are only compared on equal input.
+def run_suite(seed=0, count=10, repeat=3):
+    sets = suite_puzzles(seed, count)
+    results = {
+        "version": SUITE_VERSION,
+        "seed": seed,
+        "count": count,
+        "repeat": repeat,
+        "python": platform.python_version(),
+        "sets": {
+            name: hashlib.sha256("".join(puzzles).encode()).hexdigest()[:16]
+            for name, puzzles in sets.items()
+        },
+        "solvers": {},
+    }
+    for solver_name, (kind, option) in SUITE_SOLVERS.items():
+        results["solvers"][solver_name] = {
+            set_name: measure(
+                lambda puzzle: suite_solve(kind, option, puzzle_to_grid(puzzle)),
+                puzzles,
+                repeat,
+            )
+            for set_name, puzzles in sets.items()
+        }
+    generator = SudokuGenerator(seed)
+    # Every call digs a new puzzle, so there is nothing to repeat
+    results["generator"] = measure(
+        lambda _: (generator.generate_puzzle(), 0), range(count), repeat=1
+    )
+    return results
+
+
+# Metrics compared between suite runs, and whether lower is better
+SUITE_METRICS = {"p50_ms": True, "p90_ms": True, "peak_kib": True, "nodes": True}
+
+
+# Regressions of current against baseline suite results: every compared
+# metric that got worse by more than tolerance (0.25 = 25%), as
+# (solver, set, metric, baseline, current)
+def compare_results(baseline, current, tolerance=0.25):
+    if baseline["sets"] != current["sets"]:
+        raise ValueError("Results are for different puzzle sets")
+    pairs = [
+        (solver, set_name, measured, current["solvers"][solver][set_name])
+        for solver, by_set in baseline["solvers"].items()
+        if solver in current["solvers"]
+        for set_name, measured in by_set.items()
+    ]
+    pairs.append(("generator", "-", baseline["generator"], current["generator"]))
+    regressions = []
+    for solver, set_name, old, new in pairs:
+        for metric in SUITE_METRICS:
+            if new[metric] > old[metric] * (1 + tolerance):
+                regressions.append((solver, set_name, metric, old[metric], new[metric]))
+    return regressions
+
+
+# python Benchmark.py suite [results.json [baseline.json]]: run the suite,
+# print it, optionally write it and list regressions against a baseline
+def suite_main(arguments, seed=0, count=10):
+    results = run_suite(seed, count)
+    for solver, by_set in results["solvers"].items():
+        for set_name, measured in by_set.items():
+            print(
+                f"{solver:12s} {set_name:11s} p50: {measured['p50_ms']:9.2f} ms  "
+                f"p90: {measured['p90_ms']:9.2f} ms  "
+                f"{measured['nodes_per_second']:10.0f} nodes/s  "
+                f"peak: {measured['peak_kib']:8.1f} KiB  solved: {measured['solved']}"
+            )
+    generated = results["generator"]
+    print(
+        f"{'generator':24s} p50: {generated['p50_ms']:9.2f} ms  "
+        f"p90: {generated['p90_ms']:9.2f} ms  peak: {generated['peak_kib']:8.1f} KiB"
+    )
+    if arguments:
+        with open(arguments[0], "w") as target:
+            json.dump(results, target, indent=2, sort_keys=True)
+    if len(arguments) > 1:
+        with open(arguments[1]) as source:
+            baseline = json.load(source)
+        regressions = compare_results(baseline, results)
+        for solver, set_name, metric, old, new in regressions:
+            print(f"REGRESSION {solver} {set_name} {metric}: {old:.2f} -> {new:.2f}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["suite"]:
+        sys.exit(suite_main(sys.argv[2:]))
+    bench_neighbor_index()
+    bench_domain_stores()
+    bench_construction()
+    bench_inference()
+    bench_arc_consistency()
+    bench_constraint_models()
+    bench_value_ordering()
+    bench_stats()
+    bench_solver_backends()
+    bench_complete_grids()
+    bench_sizes()
@@ -0,0 +1,148 @@
+import argparse
+import sys
+from itertools import islice
+from Batch import SOLVERS, solve_many
+from Grader import DIFFICULTIES
+from PuzzleIO import read_puzzles, write_puzzles
+from Template import grid_to_puzzle, puzzle_to_grid
+
+# Headless command line for the solver and generator:
+#   python CLI.py solve|generate|validate|bench ...
+# Every command imports what it needs only when it runs, so a worker process
+# starts without loading pygame, and NumPy is only loaded by the commands
+# that hand grids to it (generate and validate).
+
+
+# Puzzle strings given on the command line, or else the lines of --input
+def puzzles_from(args):
+    if args.puzzles:
+        return iter(args.puzzles)
+    return read_puzzles(args.input)
+
+
+# Write each solution (or "unsolvable", or "invalid" for an unreadable
+# puzzle) in input order as it arrives; exit status 1 if any puzzle had no
+# solution
+def solve_command(args):
+    unsolvable = 0
+
+    def lines():
+        nonlocal unsolvable
+        for result in solve_many(
+            puzzles_from(args), args.workers, args.chunksize, True, args.solver
+        ):
+            if result.solution is None:
+                unsolvable += 1
+                yield "invalid" if result.error is not None else "unsolvable"
+            else:
+                yield result.solution
+
+    write_puzzles(args.output, lines())
+    return 1 if unsolvable else 0
+
+
+def generate_command(args):
+    from Generator import SudokuGenerator
+
+    generator = SudokuGenerator(args.seed, args.box)
+    write_puzzles(
+        args.output,
+        (
+            grid_to_puzzle(generator.generate_puzzle(args.difficulty))
+            for _ in range(args.count)
+        ),
+    )
+    return 0
+
+
+# Write "valid" or "invalid" per puzzle as each chunk of --chunksize puzzles
+# is checked; exit status 1 if any is invalid. Puzzles of one size within a
+# chunk are checked together in a single validate_grids call.
+def validate_command(args):
+    from Validator import validate_grids
+
+    invalid = 0
+
+    def lines():
+        nonlocal invalid
+        puzzles = puzzles_from(args)
+        while True:
+            chunk = list(islice(puzzles, args.chunksize))
+            if not chunk:
+                return
+            valid = [False] * len(chunk)  # Unreadable puzzles stay invalid
+            by_size = {}
+            for index, puzzle in enumerate(chunk):
+                try:
+                    grid = puzzle_to_grid(puzzle)
+                except ValueError:
+                    continue
+                by_size.setdefault(len(grid), []).append((index, grid))
+            for entries in by_size.values():
+                results = validate_grids([grid for _, grid in entries], args.complete)
+                for (index, _), ok in zip(entries, results):
+                    valid[index] = bool(ok)
+            invalid += valid.count(False)
+            yield from ("valid" if ok else "invalid" for ok in valid)
+
+    write_puzzles(args.output, lines())
+    return 1 if invalid else 0
+
+
+def bench_command(args):
+    from Benchmark import suite_main
+
+    return suite_main(args.files, args.seed, args.count)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless Sudoku tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    solve = commands.add_parser("solve", help="solve puzzles")
+    solve.add_argument("puzzles", nargs="*", help="puzzle strings (else --input)")
+    solve.add_argument("-i", "--input", default="-", help="puzzle file or -")
+    solve.add_argument("-o", "--output", default="-", help="output file or -")
+    solve.add_argument(
+        "-w", "--workers", type=int, default=0, help="processes (0: this one)"
+    )
+    solve.add_argument("--chunksize", type=int, default=64)
+    solve.add_argument("--solver", choices=SOLVERS, default="auto")
+    solve.set_defaults(run=solve_command)
+
+    generate = commands.add_parser("generate", help="generate puzzles")
+    generate.add_argument("-n", "--count", type=int, default=1)
+    generate.add_argument("-d", "--difficulty", choices=DIFFICULTIES)
+    generate.add_argument("--box", type=int, default=3, help="3: 9x9, 4: 16x16")
+    generate.add_argument("--seed", type=int)
+    generate.add_argument("-o", "--output", default="-", help="output file or -")
+    generate.set_defaults(run=generate_command)
+
+    validate = commands.add_parser("validate", help="check puzzles for conflicts")
+    validate.add_argument("puzzles", nargs="*", help="puzzle strings (else --input)")
+    validate.add_argument("-i", "--input", default="-", help="puzzle file or -")
+    validate.add_argument("-o", "--output", default="-", help="output file or -")
+    validate.add_argument(
+        "--complete", action="store_true", help="also require every cell filled"
+    )
+    validate.add_argument("--chunksize", type=int, default=4096)
+    validate.set_defaults(run=validate_command)
+
+    bench = commands.add_parser("bench", help="run the benchmark suite")
+    bench.add_argument(
+        "files", nargs="*", help="results.json to write, then a baseline to compare"
+    )
+    bench.add_argument("--seed", type=int, default=0)
+    bench.add_argument("-n", "--count", type=int, default=10)
+    bench.set_defaults(run=bench_command)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.run(args)
+    except ValueError as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,112 +1,424 @@
-from collections import defaultdict, deque
-
-
-class CSP:
-    # Initialize the CSP object with variables, domains, and constraints
-    def __init__(self, variables, domains, constraints):
-        self.variables = variables  # List of variables
-        self.domains = domains  # Dictionary mapping variables to their domains
-        self.constraints = constraints  # List of constraints
-        self.arc_trees = defaultdict(dict)  # Store revised values for each variable
-
-    # Check if assigning a value to a variable is consistent with the current assignment
-    def is_consistent(self, variable, value, assignment):
-        # Check consistency with respect to other variables
-        for var_i, var_j in self.constraints:
-            if var_i == variable:
-                if var_j in assignment and assignment[var_j] == value:
-                    return False  # Inconsistent due to value constraint
-            elif var_j == variable:
-                if var_i in assignment and assignment[var_i] == value:
-                    return False  # Inconsistent due to value constraint
-        return True
-
-    # Perform arc consistency algorithm
-    def arc_consistency(self):
-        queue = deque(self.constraints)  # Initialize a queue with constraints
-        while queue:
-            constraint = queue.popleft()  # Dequeue a constraint
-            if self.revise(constraint):  # Perform revise operation
-                if len(self.domains[constraint[0]]) == 0:
-                    return False  # If domain is empty, inconsistency detected
-                for neighbor in self.get_neighbors(constraint[0]):
-                    queue.append((neighbor, constraint[0]))  # Add neighbors to queue
-        return True  # If no inconsistency detected, return True
-
-    # Revise the domain of a variable based on the given constraint
-    def revise(self, constraint):
-        revised = False
-        var_i, var_j = constraint
-        original_domain_i = set(
-            self.domains[var_i]
-        )  # Store the original domain of var_i
-        for value_i in original_domain_i:  # Iterate over the original domain of var_i
-            if all(
-                not self.is_consistent(var_i, value_i, {var_j: value_j})
-                for value_j in self.domains[var_j]
-            ):
-                self.domains[var_i] = [
-                    value for value in self.domains[var_i] if value != value_i
-                ]  # Remove inconsistent value from domain
-                revised = True
-        if revised:
-            self.arc_trees[var_i][var_j] = list(
-                self.domains[var_i]
-            )  # Save revised values for arc consistency
-        return revised
-
-    # Get neighbors of a variable based on constraints
-    def get_neighbors(self, variable):
-        neighbors = []
-        for constraint in self.constraints:
-            if constraint[0] == variable:
-                neighbors.append(constraint[1])  # Add neighbor to list
-        return neighbors
-
-    # Backtracking search algorithm to find a solution
-    def backtracking_search(self, assignment={}):
-        if len(assignment) == len(self.variables):
-            return assignment  # Solution found
-        var = self.select_unassigned_variable(assignment)  # Select unassigned variable
-        for value in self.order_domain_values(var, assignment):
-            if self.is_consistent(var, value, assignment):  # Check consistency
-                assignment[var] = value  # Assign value to variable
-                result = self.backtracking_search(assignment)  # Recursive call
-                if result is not None:
-                    return result
-                del assignment[var]  # Backtrack if no solution found
-        return None  # No solution found
-
-    # MRV: Select unassigned variable with Minimum Remaining Values
-    def select_unassigned_variable(self, assignment):
-        unassigned_variables = [var for var in self.variables if var not in assignment]
-        return min(unassigned_variables, key=lambda var: len(self.domains[var]))
-
-    # LCV: Order domain values using Least Constraining Value heuristic
-    def order_domain_values(self, variable, assignment):
-        def count_conflicts(value):
-            conflicts = 0
-            for neighbor in self.get_neighbors(variable):
-                if neighbor not in assignment:
-                    for neighbor_value in self.domains[neighbor]:
-                        if not self.is_consistent(
-                            neighbor, neighbor_value, {variable: value}
-                        ):
-                            conflicts += 1
-            return conflicts
-
-        return sorted(self.domains[variable], key=count_conflicts)
-
-    # Solve the CSP problem
-    def solve(self):
-        if not self.arc_consistency():
-            return None  # No solution possible due to inconsistency
-        return self.backtracking_search()
-
-    # Print arc consistency information
-    def print_arc_trees(self):
-        print("Arc Trees:")
-        for var_i, neighbor_dict in self.arc_trees.items():
-            print(f"Variable {var_i}:")
-            for var_j, revised_domain in neighbor_dict.items():
-                print(f"  Neighbor variable {var_j}: Revised domain = {revised_domain}")
+from collections import deque
+from Constraints import Constraint
+from Domains import DOMAIN_STORES
+
+# Domain pruning applied after each assignment during backtracking search
+INFERENCE_MODES = ("none", "forward_checking", "mac")
+# How revise finds unsupported values: "ac3" asks the domain store, which for
+# "must differ" arcs only has to look at singleton domains; "ac2001" remembers
+# the last support found for every value and only searches again once it is gone
+ARC_ALGORITHMS = ("ac3", "ac2001")
+# How search orders the values of a variable: "lcv" tries first the values the
+# fewest neighbors still hold (least constraining value); "static" keeps
+# domain order, which skips that bookkeeping where it does not pay for itself
+VALUE_ORDERINGS = ("lcv", "static")
+
+
+class CSP:
+    # Initialize the CSP object with variables, domains, and constraints
+    # constraints mixes (var_i, var_j) "must differ" arcs with typed
+    # Constraints.Constraint objects, each propagated by its own filtering
+    # domain_store selects how domains are held: "list" (default) or "bitmask"
+    # neighbors may pass in a prebuilt index (see build_neighbors) to share it
+    # stats, a Stats.SolveStats, collects counters and timings of every solve
+    # trace, a Trace.ArcTrace, records revised domains for print_arc_trees
+    # arc_algorithm is one of ARC_ALGORITHMS and value_ordering one of
+    # VALUE_ORDERINGS; solve() can override either
+    def __init__(
+        self,
+        variables,
+        domains,
+        constraints,
+        domain_store="list",
+        neighbors=None,
+        stats=None,
+        trace=None,
+        arc_algorithm="ac3",
+        value_ordering="lcv",
+    ):
+        if arc_algorithm not in ARC_ALGORITHMS:
+            raise ValueError(f"Unknown arc consistency algorithm: {arc_algorithm}")
+        if value_ordering not in VALUE_ORDERINGS:
+            raise ValueError(f"Unknown value ordering: {value_ordering}")
+        self.variables = variables  # List of variables
+        self.domains = DOMAIN_STORES[domain_store](
+            domains
+        )  # Mapping of variables to their domains
+        # Arcs go through the AC-3 queue; typed constraints are propagated
+        # as a whole instead of being expanded into arcs
+        self.constraints = [c for c in constraints if not isinstance(c, Constraint)]
+        self.typed_constraints = [c for c in constraints if isinstance(c, Constraint)]
+        self.constraints_on = {var: [] for var in variables}  # Typed, per variable
+        for constraint in self.typed_constraints:
+            for var in constraint.scope:
+                self.constraints_on[var].append(constraint)
+        self.trace = trace  # Off by default: no domain copies are made
+        self.arc_algorithm = arc_algorithm
+        # (var_i, value_i, var_j) -> last value of var_j found supporting
+        # value_i. These are residues: a stale entry is simply searched
+        # again, so backtracking never has to restore them.
+        self.supports = {}
+        self.value_ordering = value_ordering
+        if neighbors is None:
+            neighbors = self.build_neighbors(variables, self.constraints)
+        self.neighbors = neighbors  # Variable -> set of constrained variables
+        self.nodes_expanded = 0  # Search nodes visited by the last search
+        self.stats = stats
+        if stats is not None:
+            stats.attach(self)  # Only instrumented CSPs pay for the counting
+
+    # Index the constraint graph once: variable -> set of variables it shares an arc
+    # with, in either direction, so lookups no longer scan the constraint list
+    @staticmethod
+    def build_neighbors(variables, constraints):
+        neighbors = {var: set() for var in variables}
+        for var_i, var_j in constraints:
+            neighbors.setdefault(var_i, set()).add(var_j)
+            neighbors.setdefault(var_j, set()).add(var_i)  # Reverse arc
+        return neighbors
+
+    # Check if assigning a value to a variable is consistent with the current assignment
+    def is_consistent(self, variable, value, assignment):
+        # Check consistency with respect to constrained variables only, walking
+        # whichever of the neighbor set and the assignment is smaller
+        neighbors = self.neighbors[variable]
+        if len(assignment) < len(neighbors):
+            for other, other_value in assignment.items():
+                if other_value == value and other in neighbors:
+                    return False  # Inconsistent due to value constraint
+        else:
+            for neighbor in neighbors:
+                if neighbor in assignment and assignment[neighbor] == value:
+                    return False  # Inconsistent due to value constraint
+        for constraint in self.constraints_on[variable]:
+            if not constraint.consistent(self, variable, value, assignment):
+                return False
+        return True
+
+    # Perform arc consistency algorithm, starting from the given arcs and
+    # typed constraints (all of them by default). Arcs are revised first; a
+    # typed constraint runs once the arc queue is empty, and whatever either
+    # prunes wakes up the arcs and typed constraints on that variable. Domains
+    # changed are recorded on trail, if given.
+    def arc_consistency(self, queue=None, trail=None, pending=None):
+        queue = deque(
+            self.constraints if queue is None else queue
+        )  # Initialize a queue with constraints
+        queued = set(queue)  # Arcs waiting in the queue, so none is added twice
+        pending = deque(self.typed_constraints if pending is None else pending)
+        waiting = set(pending)  # Typed constraints waiting in pending
+        while queue or pending:
+            if not queue:
+                constraint = pending.popleft()
+                waiting.discard(constraint)
+                changed = self.propagate(constraint, trail)
+                if changed is None:
+                    return False  # A domain of its scope was wiped out
+                for var in changed:
+                    for neighbor in self.get_neighbors(var):
+                        arc = (neighbor, var)
+                        if arc not in queued:
+                            queued.add(arc)
+                            queue.append(arc)
+                    for other in self.constraints_on[var]:
+                        if other is not constraint and other not in waiting:
+                            waiting.add(other)
+                            pending.append(other)
+                continue
+            constraint = queue.popleft()  # Dequeue a constraint
+            queued.discard(constraint)
+            if self.revise(constraint, trail):  # Perform revise operation
+                var_i, var_j = constraint
+                if self.domains.size(var_i) == 0:
+                    return False  # If domain is empty, inconsistency detected
+                for neighbor in self.get_neighbors(var_i):
+                    # Values just removed from var_i had no support in var_j,
+                    # so they cannot have been supporting anything there
+                    arc = (neighbor, var_i)
+                    if neighbor != var_j and arc not in queued:
+                        queued.add(arc)
+                        queue.append(arc)  # Add neighbors to queue
+                for other in self.constraints_on[var_i]:
+                    if other not in waiting:
+                        waiting.add(other)
+                        pending.append(other)
+        return True  # If no inconsistency detected, return True
+
+    # Revise the domain of a variable based on the given constraint
+    def revise(self, constraint, trail=None):
+        var_i, var_j = constraint
+        if var_j not in self.neighbors[var_i]:
+            return False  # Unconstrained pair, every value is supported
+        original_domain_i = self.domains.snapshot(var_i)
+        # value_i is supported when var_j can still take any other value; the
+        # store removes every unsupported value in place without copying
+        if self.arc_algorithm == "ac2001":
+            revised = self.remove_unsupported_ac2001(var_i, var_j)
+        else:
+            revised = self.domains.remove_unsupported(var_i, var_j)
+        if revised:
+            if trail is not None:
+                trail.append((var_i, original_domain_i))  # Undo record
+            if self.trace is not None:
+                self.trace.record(var_i, var_j, self.domains[var_i])
+        return revised
+
+    # AC-2001 revision: a value keeps its remembered support while that is
+    # still in var_j's domain, and var_j is only searched when it is gone
+    def remove_unsupported_ac2001(self, var_i, var_j):
+        domains, supports = self.domains, self.supports
+        revised = False
+        for value_i in domains.values_of(var_i):
+            key = (var_i, value_i, var_j)
+            support = supports.get(key)
+            if support is not None and domains.contains(var_j, support):
+                continue
+            for value_j in domains.values_of(var_j):
+                if value_j != value_i:
+                    supports[key] = value_j
+                    break
+            else:
+                domains.remove(var_i, value_i)
+                revised = True
+        return revised
+
+    # Run one typed constraint's filtering: the variables whose domains it
+    # changed, or None when one was wiped out
+    def propagate(self, constraint, trail=None):
+        return constraint.propagate(self, trail)
+
+    # Remove values from var's domain on behalf of a typed constraint,
+    # recording the old domain on trail. False if the domain was wiped out.
+    def prune(self, var, values, trail=None):
+        if trail is not None:
+            trail.append((var, self.domains.snapshot(var)))
+        removed = set(values)
+        self.domains[var] = [
+            value for value in self.domains.values_of(var) if value not in removed
+        ]
+        return self.domains.size(var) > 0
+
+    # Get neighbors of a variable based on constraints
+    def get_neighbors(self, variable):
+        return self.neighbors[variable]
+
+    # Backtracking search algorithm to find a solution. inference selects the
+    # pruning done after each assignment: "none", "forward_checking" or "mac"
+    def backtracking_search(self, assignment=None, inference="none"):
+        search = self.search(assignment, inference)
+        solution = next(search, None)
+        search.close()  # Leave the domains as the search found them
+        return solution
+
+    # A paused Search over this CSP, starting from a copy of assignment. Step
+    # or run it to explore; iterating it yields each solution in turn. Close
+    # it when done with it early, so the domains it pruned are restored.
+    def search(self, assignment=None, inference="none"):
+        if inference not in INFERENCE_MODES:
+            raise ValueError(f"Unknown inference mode: {inference}")
+        self.nodes_expanded = 0
+        return Search(self, assignment, inference)
+
+    # Yield every solution (as a new dict), continuing the same search after
+    # each one so the propagated domains are shared between branches
+    def iter_solutions(self, assignment=None, inference="forward_checking"):
+        search = self.search(assignment, inference)
+        if not self.arc_consistency():
+            return  # No solution possible due to inconsistency
+        try:
+            for solution in search:
+                yield dict(solution)
+        finally:
+            search.close()  # Also reached when the caller stops early
+
+    # Count solutions, stopping as soon as limit is reached. limit=2 is enough
+    # to tell a unique solution (1) from an ambiguous puzzle (2).
+    def count_solutions(self, limit=2, inference="forward_checking"):
+        count = 0
+        solutions = self.iter_solutions(inference=inference)
+        for _ in solutions:
+            count += 1
+            if count >= limit:
+                break
+        solutions.close()
+        return count
+
+    # Prune domains after assigning value to var. Returns False if some domain
+    # was wiped out, meaning the assignment cannot lead to a solution.
+    def infer(self, var, value, assignment, inference, trail):
+        if inference == "none":
+            return True
+        trail.append((var, self.domains.snapshot(var)))
+        self.domains.assign(var, value)
+        if inference == "forward_checking":
+            for neighbor in self.neighbors[var]:
+                if neighbor not in assignment and self.domains.contains(
+                    neighbor, value
+                ):
+                    trail.append((neighbor, self.domains.snapshot(neighbor)))
+                    self.domains.remove(neighbor, value)
+                    if self.domains.size(neighbor) == 0:
+                        return False  # Domain wipe-out
+            # Typed constraints on var get one filtering pass each
+            for constraint in self.constraints_on[var]:
+                if self.propagate(constraint, trail) is None:
+                    return False
+            return True
+        # MAC: propagate arc consistency from the arcs and typed constraints
+        # on var
+        return self.arc_consistency(
+            [(neighbor, var) for neighbor in self.neighbors[var]],
+            trail,
+            self.constraints_on[var],
+        )
+
+    # Restore every domain recorded on trail after position mark
+    def undo(self, trail, mark):
+        while len(trail) > mark:
+            variable, snapshot = trail.pop()
+            self.domains.restore(variable, snapshot)
+
+    # MRV: Select unassigned variable with Minimum Remaining Values
+    def select_unassigned_variable(self, assignment):
+        unassigned_variables = [var for var in self.variables if var not in assignment]
+        return min(unassigned_variables, key=self.domains.size)
+
+    # LCV: Order domain values using Least Constraining Value heuristic, or
+    # keep domain order with value_ordering="static"
+    def order_domain_values(self, variable, assignment):
+        if self.value_ordering == "static":
+            return list(self.domains.values_of(variable))
+        neighbors = [n for n in self.neighbors[variable] if n not in assignment]
+
+        # A neighbor value conflicts with value exactly when the two are equal
+        def count_conflicts(value):
+            conflicts = 0
+            for neighbor in neighbors:
+                if self.domains.contains(neighbor, value):
+                    conflicts += 1
+            return conflicts
+
+        return sorted(self.domains[variable], key=count_conflicts)
+
+    # Solve the CSP problem. arc_algorithm and value_ordering, if given,
+    # replace the ones chosen at construction for this and later solves.
+    def solve(self, inference="none", arc_algorithm=None, value_ordering=None):
+        if arc_algorithm is not None:
+            if arc_algorithm not in ARC_ALGORITHMS:
+                raise ValueError(f"Unknown arc consistency algorithm: {arc_algorithm}")
+            self.arc_algorithm = arc_algorithm
+        if value_ordering is not None:
+            if value_ordering not in VALUE_ORDERINGS:
+                raise ValueError(f"Unknown value ordering: {value_ordering}")
+            self.value_ordering = value_ordering
+        if not self.arc_consistency():
+            return None  # No solution possible due to inconsistency
+        return self.backtracking_search(inference=inference)
+
+    # Print arc consistency information recorded by the trace, if any
+    def print_arc_trees(self):
+        print("Arc Trees:")
+        if self.trace is None:
+            print("  Not recorded; pass trace=ArcTrace() to record them")
+            return
+        for var_i, neighbor_dict in self.trace.arc_trees().items():
+            print(f"Variable {var_i}:")
+            for var_j, revised_domain in neighbor_dict.items():
+                print(f"  Neighbor variable {var_j}: Revised domain = {revised_domain}")
+
+
+class Search:
+    # Backtracking search driven by an explicit stack instead of recursion, so
+    # it can be paused after any step and resumed later, and is not bounded by
+    # the recursion limit. Each stack frame is [variable, remaining values,
+    # trail mark]; the trail holds (variable, domain snapshot) pairs so pruned
+    # domains can be restored on backtrack.
+    def __init__(self, csp, assignment=None, inference="none"):
+        self.csp = csp
+        self.inference = inference
+        self.assignment = dict(assignment or {})
+        self.trail = []
+        self.stack = []
+        self.steps = 0
+        self.started = False  # The root is expanded by the first step
+
+    @property
+    def done(self):
+        return self.started and not self.stack
+
+    @property
+    def depth(self):
+        return len(self.stack)
+
+    # Visit the current assignment: True if it is complete, otherwise push a
+    # frame for the next variable to branch on
+    def expand(self):
+        csp = self.csp
+        csp.nodes_expanded += 1
+        if len(self.assignment) == len(csp.variables):
+            return True  # Solution found
+        var = csp.select_unassigned_variable(self.assignment)
+        values = iter(csp.order_domain_values(var, self.assignment))
+        self.stack.append([var, values, len(self.trail)])
+        return False
+
+    # Drop the top frame once every value of its variable has been tried
+    def retreat(self):
+        self.stack.pop()
+
+    # Advance by one move: assign the next consistent value of the top
+    # variable (undoing its previous one) or retreat from it. Returns True when
+    # the move completed the assignment.
+    def step(self):
+        if not self.started:
+            self.started = True
+            return self.expand()
+        if not self.stack:
+            return False
+        self.steps += 1
+        csp, assignment, trail = self.csp, self.assignment, self.trail
+        var, values, mark = self.stack[-1]
+        if var in assignment:
+            csp.undo(trail, mark)  # Restore domains pruned below this node
+            del assignment[var]  # Backtrack and try the next value
+        for value in values:
+            if csp.is_consistent(var, value, assignment):  # Check consistency
+                assignment[var] = value  # Assign value to variable
+                if csp.infer(var, value, assignment, self.inference, trail):
+                    return self.expand()
+                csp.undo(trail, mark)
+                del assignment[var]
+        self.retreat()
+        return False
+
+    # Take up to max_steps steps (all that are needed by default). Returns the
+    # assignment when a solution is reached, otherwise None: check done to
+    # tell a finished search from a paused one. The assignment is live and
+    # changes once the search is resumed.
+    def run(self, max_steps=None):
+        step = self.step
+        while self.stack or not self.started:
+            if max_steps is not None:
+                if max_steps <= 0:
+                    return None
+                max_steps -= 1
+            if step():
+                return self.assignment
+        return None
+
+    # Give up the search: undo every pruning still on the trail, so the CSP's
+    # domains are back to what they were when the search started, and drop
+    # the remaining frames. The assignment is left as it was.
+    def close(self):
+        self.csp.undo(self.trail, 0)
+        self.stack.clear()
+        self.started = True
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        solution = self.run()
+        if solution is None:
+            raise StopIteration
+        return solution
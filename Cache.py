@@ -0,0 +1,222 @@
+import sqlite3
+import threading
+from collections import OrderedDict, namedtuple
+from itertools import groupby, islice, permutations, product
+from Template import box_of, grid_to_puzzle, puzzle_to_grid
+
+# A Sudoku symmetry as canonical_form finds it: transpose the grid or not,
+# then rows[i] and cols[j] are the source row and column that land at (i, j),
+# and labels maps every source digit to its canonical digit
+Transform = namedtuple("Transform", ["transposed", "rows", "cols", "labels"])
+
+
+# Minimal representative of grid under the Sudoku symmetries (transposition,
+# band and stack permutations, row and column permutations inside them, digit
+# relabeling), as (canonical puzzle string, Transform). Rows and columns are
+# first sorted by signatures that no symmetry changes, and only the orders
+# those leave tied are tried, relabeling digits by first appearance and
+# keeping the smallest result. limit caps the tied orders tried per
+# direction: highly symmetric grids can then get a representative that is
+# not minimal, which only costs cache hits, never correctness.
+def canonical_form(grid, limit=32):
+    grid = [[int(value) for value in row] for row in grid]
+    box = box_of(grid)
+    best = None
+    for transposed in (False, True):
+        source = [list(col) for col in zip(*grid)] if transposed else grid
+        row_orders = line_orders(source, box, limit)
+        col_orders = line_orders([list(col) for col in zip(*source)], box, limit)
+        for rows in row_orders:
+            for cols in col_orders:
+                key, labels = relabeled(source, rows, cols)
+                if best is None or key < best[0]:
+                    best = key, Transform(transposed, rows, cols, labels)
+    key, transform = best
+    return (
+        grid_to_puzzle([key[i : i + len(grid)] for i in range(0, len(key), len(grid))]),
+        transform,
+    )
+
+
+# Orders of the lines (rows of lines) that sort bands, and lines inside each
+# band, by signature; every order among tied ones is listed, up to limit
+def line_orders(lines, box, limit):
+    size = box * box
+    counts = [sum(1 for line in lines if line[j]) for j in range(size)]
+
+    # Clue count, clues per stack and the clue counts of the crossing lines
+    # at the clues: all kept by the symmetries that map line to another line
+    def signature(line):
+        clues = [j for j in range(size) if line[j]]
+        return (
+            len(clues),
+            tuple(sorted(sum(1 for j in clues if j // box == s) for s in range(box))),
+            tuple(sorted(counts[j] for j in clues)),
+        )
+
+    signatures = [signature(line) for line in lines]
+    bands = []
+    for start in range(0, size, box):
+        members = sorted(range(start, start + box), key=signatures.__getitem__)
+        bands.append((tuple(signatures[line] for line in members), members))
+    bands.sort(key=lambda band: band[0])
+
+    def band_options(members):
+        groups = [list(group) for _, group in groupby(members, signatures.__getitem__)]
+        return [
+            [line for part in parts for line in part]
+            for parts in product(*(permutations(group) for group in groups))
+        ]
+
+    def orders():
+        band_groups = [list(group) for _, group in groupby(bands, lambda band: band[0])]
+        for sequence in product(*(permutations(group) for group in band_groups)):
+            options = [
+                band_options(members) for group in sequence for _, members in group
+            ]
+            for parts in product(*options):
+                yield [line for part in parts for line in part]
+
+    return list(islice(orders(), limit))
+
+
+# The grid read through rows and cols with digits renumbered in order of
+# first appearance, as a flat list, and the digit -> label map (digits that
+# do not appear get the remaining labels in order)
+def relabeled(source, rows, cols):
+    labels = {}
+    key = []
+    for row in rows:
+        line = source[row]
+        for col in cols:
+            value = line[col]
+            if value and value not in labels:
+                labels[value] = len(labels) + 1
+            key.append(labels.get(value, 0))
+    for digit in range(1, len(source) + 1):
+        if digit not in labels:
+            labels[digit] = len(labels) + 1
+    return key, labels
+
+
+# grid (such as the solution of the puzzle transform came from) in the
+# canonical frame
+def apply_transform(grid, transform):
+    source = [list(col) for col in zip(*grid)] if transform.transposed else grid
+    labels = {0: 0, **transform.labels}
+    return [
+        [labels[int(source[row][col])] for col in transform.cols]
+        for row in transform.rows
+    ]
+
+
+# A canonical-frame grid back in the frame of the puzzle transform came from
+def invert_transform(grid, transform):
+    digits = {label: digit for digit, label in transform.labels.items()}
+    digits[0] = 0
+    size = len(grid)
+    source = [[0] * size for _ in range(size)]
+    for i, row in enumerate(transform.rows):
+        for j, col in enumerate(transform.cols):
+            source[row][col] = digits[int(grid[i][j])]
+    if transform.transposed:
+        return [list(col) for col in zip(*source)]
+    return source
+
+
+class SolutionCache:
+    # LRU of solved puzzles keyed by puzzle string, holding at most capacity
+    # entries. Each solve is stored under the puzzle itself, for a lookup
+    # that is a string conversion and a dict hit, and with canonical=True
+    # also under its canonical form, so any symmetric variant of a cached
+    # puzzle is answered by mapping the stored solution back. Unsolvable
+    # puzzles are cached too. path, if given, keeps the entries in a SQLite
+    # file across runs.
+    def __init__(self, capacity=1024, path=None, canonical=True):
+        self.capacity = capacity
+        self.canonical = canonical
+        self.entries = OrderedDict()  # Puzzle -> solution, "" if unsolvable
+        self.lock = threading.Lock()  # Guards entries and the connection
+        self.hits = 0
+        self.misses = 0
+        self.connection = None
+        if path is not None:
+            self.connection = sqlite3.connect(path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS solutions "
+                "(puzzle TEXT PRIMARY KEY, solution TEXT NOT NULL)"
+            )
+            self.connection.commit()
+            rows = self.connection.execute(
+                "SELECT puzzle, solution FROM solutions ORDER BY rowid DESC LIMIT ?",
+                (capacity,),
+            ).fetchall()
+            for puzzle, solution in reversed(rows):
+                self.entries[puzzle] = solution
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    # Solution of grid as a list grid (None if it has none), from the cache
+    # when grid or a symmetric variant was seen before, otherwise from
+    # solve(grid), which is then cached. Exceptions from solve, such as
+    # Solver.SolveTimeout, are passed on and nothing is cached.
+    def solve(self, grid, solve):
+        puzzle = grid_to_puzzle(grid)
+        entry = self.get(puzzle)
+        if entry is not None:
+            self.hits += 1
+            return puzzle_to_grid(entry) if entry else None
+        if self.canonical:
+            key, transform = canonical_form(grid)
+            entry = self.get(key)
+            if entry is not None:
+                self.hits += 1
+                solution = None
+                if entry:
+                    solution = invert_transform(puzzle_to_grid(entry), transform)
+                self.put(puzzle, grid_to_puzzle(solution) if solution else "")
+                return solution
+        self.misses += 1
+        solution = solve(grid)
+        if solution is None:
+            self.put(puzzle, "")
+            if self.canonical:
+                self.put(key, "")
+        else:
+            self.put(puzzle, grid_to_puzzle(solution))
+            if self.canonical:
+                self.put(key, grid_to_puzzle(apply_transform(solution, transform)))
+        return solution
+
+    def get(self, puzzle):
+        with self.lock:
+            entry = self.entries.get(puzzle)
+            if entry is not None:
+                self.entries.move_to_end(puzzle)
+            return entry
+
+    def put(self, puzzle, solution):
+        with self.lock:
+            self.entries[puzzle] = solution
+            self.entries.move_to_end(puzzle)
+            evicted = []
+            while len(self.entries) > self.capacity:
+                evicted.append(self.entries.popitem(last=False)[0])
+            if self.connection is not None:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO solutions (puzzle, solution) VALUES (?, ?)",
+                    (puzzle, solution),
+                )
+                self.connection.executemany(
+                    "DELETE FROM solutions WHERE puzzle = ?",
+                    [(key,) for key in evicted],
+                )
+                self.connection.commit()
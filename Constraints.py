@@ -0,0 +1,246 @@
+class Constraint:
+    # Base class of the typed constraints a CSP accepts alongside its plain
+    # (var_i, var_j) "must differ" arcs. scope is the tuple of constrained
+    # variables. Subclasses implement:
+    #   consistent(csp, var, value, assignment) - can var take value given
+    #       the variables assigned so far (var itself is not assigned yet)
+    #   propagate(csp, trail) - prune the domains of the scope through
+    #       csp.prune; returns the variables whose domains changed, or None
+    #       when one was wiped out
+    def __init__(self, scope):
+        self.scope = tuple(scope)
+
+    def consistent(self, csp, var, value, assignment):
+        raise NotImplementedError
+
+    def propagate(self, csp, trail=None):
+        raise NotImplementedError
+
+
+class Binary(Constraint):
+    # Any relation between two variables, given as predicate(value_i, value_j).
+    # Propagation is AC-2001 in both directions: the last support found for
+    # each value is remembered and only searched for again once it is gone.
+    def __init__(self, var_i, var_j, predicate):
+        super().__init__((var_i, var_j))
+        self.predicate = predicate
+        self.supports = {}  # (variable, value) -> supporting value of the other
+
+    def consistent(self, csp, var, value, assignment):
+        var_i, var_j = self.scope
+        if var == var_i and var_j in assignment:
+            return self.predicate(value, assignment[var_j])
+        if var == var_j and var_i in assignment:
+            return self.predicate(assignment[var_i], value)
+        return True
+
+    def propagate(self, csp, trail=None):
+        var_i, var_j = self.scope
+        changed = []
+        for var, other, holds in (
+            (var_i, var_j, self.predicate),
+            (var_j, var_i, lambda value, other: self.predicate(other, value)),
+        ):
+            unsupported = []
+            for value in csp.domains.values_of(var):
+                support = self.supports.get((var, value))
+                if support is not None and csp.domains.contains(other, support):
+                    continue
+                for other_value in csp.domains.values_of(other):
+                    if holds(value, other_value):
+                        self.supports[(var, value)] = other_value
+                        break
+                else:
+                    unsupported.append(value)
+            if unsupported:
+                if not csp.prune(var, unsupported, trail):
+                    return None
+                changed.append(var)
+        return changed
+
+
+class AllDifferent(Constraint):
+    # Every variable of the scope takes a different value. Propagation is
+    # Regin's matching-based filtering: a value stays in a domain only if
+    # some maximum matching of variables to distinct values uses it. This is
+    # stronger than the pairwise arcs it replaces (it finds naked and hidden
+    # subsets of any size) and is one constraint instead of n * (n - 1) arcs.
+    def __init__(self, scope):
+        super().__init__(scope)
+        self.matching = {}  # variable -> value, reused as a starting point
+
+    def consistent(self, csp, var, value, assignment):
+        for other in self.scope:
+            if other != var and other in assignment and assignment[other] == value:
+                return False
+        return True
+
+    def propagate(self, csp, trail=None):
+        domains = {var: list(csp.domains.values_of(var)) for var in self.scope}
+        matching = self.maximum_matching(domains)
+        if matching is None:
+            return None  # Fewer distinct values than variables
+        unsupported = self.unsupported_values(domains, matching)
+        changed = []
+        for var, values in unsupported.items():
+            if not csp.prune(var, values, trail):
+                return None
+            changed.append(var)
+        return changed
+
+    # Match every variable to a distinct value of its domain by augmenting
+    # paths, starting from the previous matching where it still holds
+    def maximum_matching(self, domains):
+        owner = {}  # value -> variable matched to it
+        for var, value in self.matching.items():
+            if value in domains[var] and value not in owner:
+                owner[value] = var
+
+        def augment(var, visited):
+            for value in domains[var]:
+                if value in visited:
+                    continue
+                visited.add(value)
+                if value not in owner or augment(owner[value], visited):
+                    owner[value] = var
+                    return True
+            return False
+
+        matched = set(owner.values())
+        for var in self.scope:
+            if var not in matched and not augment(var, set()):
+                return None
+        self.matching = {var: value for value, var in owner.items()}
+        return self.matching
+
+    # Values that belong to no maximum matching. With matched edges pointing
+    # from variable to value and the others from value to variable, an edge
+    # is kept if it is matched, reachable from a free value (an even
+    # alternating path) or inside a strongly connected component (an even
+    # alternating cycle).
+    def unsupported_values(self, domains, matching):
+        graph = {}
+        for var, values in domains.items():
+            graph.setdefault(("var", var), []).append(("value", matching[var]))
+            for value in values:
+                if value != matching[var]:
+                    graph.setdefault(("value", value), []).append(("var", var))
+        matched_values = set(matching.values())
+        free = [
+            ("value", value)
+            for value in {value for values in domains.values() for value in values}
+            if value not in matched_values
+        ]
+        reachable = set(free)
+        stack = list(free)
+        while stack:
+            node = stack.pop()
+            for successor in graph.get(node, ()):
+                if successor not in reachable:
+                    reachable.add(successor)
+                    stack.append(successor)
+        component = strongly_connected_components(graph)
+        unsupported = {}
+        for var, values in domains.items():
+            for value in values:
+                node = ("value", value)
+                if value == matching[var] or node in reachable:
+                    continue
+                if component.get(node) != component.get(("var", var)):
+                    unsupported.setdefault(var, []).append(value)
+        return unsupported
+
+
+class Sum(Constraint):
+    # The values of the scope add up to total, as in a Killer Sudoku cage.
+    # Propagation is on bounds: a value is dropped when the other variables'
+    # smallest and largest values cannot make up the rest of the total.
+    def __init__(self, scope, total):
+        super().__init__(scope)
+        self.total = total
+
+    def consistent(self, csp, var, value, assignment):
+        low = high = value
+        for other in self.scope:
+            if other == var:
+                continue
+            if other in assignment:
+                low += assignment[other]
+                high += assignment[other]
+            else:
+                values = list(csp.domains.values_of(other))
+                if not values:
+                    return False
+                low, high = low + min(values), high + max(values)
+        return low <= self.total <= high
+
+    def propagate(self, csp, trail=None):
+        changed = set()
+        while True:
+            bounds = {}
+            for var in self.scope:
+                values = list(csp.domains.values_of(var))
+                if not values:
+                    return None
+                bounds[var] = (min(values), max(values))
+            low = sum(bound[0] for bound in bounds.values())
+            high = sum(bound[1] for bound in bounds.values())
+            if low > self.total or high < self.total:
+                return None
+            narrowed = False
+            for var, (var_low, var_high) in bounds.items():
+                # What the rest of the scope leaves for var
+                least = self.total - (high - var_high)
+                most = self.total - (low - var_low)
+                outside = [
+                    value
+                    for value in csp.domains.values_of(var)
+                    if value < least or value > most
+                ]
+                if outside:
+                    if not csp.prune(var, outside, trail):
+                        return None
+                    changed.add(var)
+                    narrowed = True
+            if not narrowed:
+                return list(changed)
+
+
+# Tarjan's algorithm without recursion: node -> component number
+def strongly_connected_components(graph):
+    index, lowlink, component = {}, {}, {}
+    stack, on_stack = [], set()
+    counter = 0
+    for root in graph:
+        if root in index:
+            continue
+        work = [(root, iter(graph.get(root, ())))]
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, successors = work[-1]
+            for successor in successors:
+                if successor not in index:
+                    index[successor] = lowlink[successor] = counter
+                    counter += 1
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(graph.get(successor, ()))))
+                    break
+                if successor in on_stack:
+                    lowlink[node] = min(lowlink[node], index[successor])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component[member] = node
+                        if member == node:
+                            break
+    return component
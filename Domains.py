@@ -0,0 +1,129 @@
+from collections.abc import MutableMapping
+
+# Number of set bits in a mask (int.bit_count needs Python 3.10+)
+popcount = getattr(int, "bit_count", None) or (lambda mask: bin(mask).count("1"))
+
+
+# Yield the values whose bits are set in mask, lowest first
+def iter_bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class ListDomains(dict):
+    # Default domain store: variable -> list of values, exactly as CSP has always
+    # kept them. The helper methods below are the store interface the CSP engine
+    # uses, so it can work with either representation.
+
+    def size(self, variable):
+        return len(self[variable])
+
+    def contains(self, variable, value):
+        return value in self[variable]
+
+    def values_of(self, variable):
+        return self[variable]
+
+    # Remove each value of var_i that leaves var_j no different value to take.
+    # With two or more values left var_j supports everything, so only an empty
+    # or singleton domain can prune anything.
+    def remove_unsupported(self, var_i, var_j):
+        domain_j = self[var_j]
+        if len(domain_j) > 1:
+            return False
+        if not domain_j:
+            revised = bool(self[var_i])
+            self[var_i] = []
+            return revised
+        if domain_j[0] not in self[var_i]:
+            return False
+        self.remove(var_i, domain_j[0])
+        return True
+
+    def remove(self, variable, value):
+        # Rebuild rather than mutate: the lists may be shared with the caller
+        self[variable] = [v for v in self[variable] if v != value]
+
+    def assign(self, variable, value):
+        self[variable] = [value]
+
+    # Domain lists are only ever replaced, never mutated, so the current list
+    # is itself a snapshot
+    def snapshot(self, variable):
+        return self[variable]
+
+    def restore(self, variable, snapshot):
+        self[variable] = snapshot
+
+
+class BitmaskDomains(MutableMapping):
+    # Compact domain store: one integer bitmask per variable, bit v set when value
+    # v is still in the domain. Values must be small non-negative integers.
+    # Reading or assigning domains[var] converts to and from lists, so code
+    # written against the list API keeps working.
+
+    def __init__(self, domains=()):
+        self.masks = {}
+        for variable, values in dict(domains).items():
+            self[variable] = values
+
+    @staticmethod
+    def encode(values):
+        mask = 0
+        for value in values:
+            mask |= 1 << int(value)
+        return mask
+
+    def __getitem__(self, variable):
+        return list(iter_bits(self.masks[variable]))
+
+    def __setitem__(self, variable, values):
+        self.masks[variable] = self.encode(values)
+
+    def __delitem__(self, variable):
+        del self.masks[variable]
+
+    def __iter__(self):
+        return iter(self.masks)
+
+    def __len__(self):
+        return len(self.masks)
+
+    def size(self, variable):
+        return popcount(self.masks[variable])
+
+    def contains(self, variable, value):
+        return self.masks[variable] >> value & 1 == 1
+
+    def values_of(self, variable):
+        return iter_bits(self.masks[variable])
+
+    # Bitwise equivalent: value_i is unsupported only when var_j's mask is empty
+    # or exactly value_i's bit
+    def remove_unsupported(self, var_i, var_j):
+        mask_j = self.masks[var_j]
+        if mask_j & (mask_j - 1):
+            return False  # Two or more values left, everything is supported
+        mask_i = self.masks[var_i]
+        pruned = mask_i & mask_j if mask_j else mask_i
+        if not pruned:
+            return False
+        self.masks[var_i] = mask_i & ~pruned
+        return True
+
+    def remove(self, variable, value):
+        self.masks[variable] &= ~(1 << value)
+
+    def assign(self, variable, value):
+        self.masks[variable] = 1 << value
+
+    def snapshot(self, variable):
+        return self.masks[variable]
+
+    def restore(self, variable, snapshot):
+        self.masks[variable] = snapshot
+
+
+DOMAIN_STORES = {"list": ListDomains, "bitmask": BitmaskDomains}
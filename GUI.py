@@ -1,13 +1,23 @@
 import pygame
 import numpy as np
-from CSP import CSP
+import sys
+import threading
 import time
+from Cache import SolutionCache
 from Generator import SudokuGenerator
+from Pool import PuzzlePool
+from Solver import SolveCancelled, SolveTimeout, SudokuSolver
+from Template import SYMBOLS
+from Validator import is_valid_grid
 
 
 class GUI:
-    def __init__(self):
+    # box sets the board size: 3 for 9x9, 4 for 16x16, 5 for 25x25. Digits
+    # above 9 are shown and typed as letters (A = 10, B = 11, ...).
+    def __init__(self, box=3):
         pygame.init()
+        self.box = box
+        self.size = box * box
         self.WIDTH = 500
         self.HEIGHT = 500
         self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT + 200))
@@ -15,27 +25,30 @@ class GUI:
         self.WHITE = (255, 255, 255)
         self.BLACK = (0, 0, 0)
         self.GRAY = (128, 128, 128)
-        self.font = pygame.font.Font(None, 40)
-        self.cell_size = self.WIDTH // 9
+        self.cell_size = self.WIDTH // self.size
+        self.font = pygame.font.Font(None, self.cell_size * 3 // 4)
+        self.message_font = pygame.font.Font(None, 40)
         self.mode = 1
         self.selected_row = None
         self.selected_col = None
         self.solved = False
         self.board_unsolvable = False
 
-        self.grid = np.array(
-            [
-                [5, 3, 0, 0, 7, 0, 0, 0, 0],
-                [6, 0, 0, 1, 9, 5, 0, 0, 0],
-                [0, 9, 8, 0, 0, 0, 0, 6, 0],
-                [8, 0, 0, 0, 6, 0, 0, 0, 3],
-                [4, 0, 0, 8, 0, 3, 0, 0, 1],
-                [7, 0, 0, 0, 2, 0, 0, 0, 6],
-                [0, 6, 0, 0, 0, 0, 2, 8, 0],
-                [0, 0, 0, 4, 1, 9, 0, 0, 5],
-                [0, 0, 0, 0, 8, 0, 0, 7, 9],
-            ]
-        )
+        self.grid = np.zeros((self.size, self.size), dtype=int)
+        if box == 3:
+            self.grid = np.array(
+                [
+                    [5, 3, 0, 0, 7, 0, 0, 0, 0],
+                    [6, 0, 0, 1, 9, 5, 0, 0, 0],
+                    [0, 9, 8, 0, 0, 0, 0, 6, 0],
+                    [8, 0, 0, 0, 6, 0, 0, 0, 3],
+                    [4, 0, 0, 8, 0, 3, 0, 0, 1],
+                    [7, 0, 0, 0, 2, 0, 0, 0, 6],
+                    [0, 6, 0, 0, 0, 0, 2, 8, 0],
+                    [0, 0, 0, 4, 1, 9, 0, 0, 5],
+                    [0, 0, 0, 0, 8, 0, 0, 7, 9],
+                ]
+            )
 
         # Add mode buttons
         button_width = 100
@@ -71,16 +84,52 @@ class GUI:
         self.mode_buttons_text_color = self.BLACK
         self.mode_buttons_font = pygame.font.Font(None, 24)
 
-        self.generator = SudokuGenerator()  # Initialize SudokuGenerator
+        self.generator = SudokuGenerator(box=box)  # Initialize SudokuGenerator
+        self.difficulty = "medium"  # Difficulty of generated puzzles
+        self.pool = None
+        if box == 3:
+            self.pool = PuzzlePool().start()  # Ready puzzles, refilled in background
+        self.generate_thread = None  # Worker waiting for or digging a puzzle
+        self.generated = None
+        self.solver = SudokuSolver()  # Initialize SudokuSolver
+        # Boards solved before, or symmetric variants of them, are answered
+        # from this cache, which persists across runs
+        self.solutions = SolutionCache(path="solution_cache.sqlite3")
+        self.solve_timeout = 30.0  # Seconds before a solve is given up, or None
+        self.solve_thread = None  # Worker running the current solve
+        self.solve_outcome = None  # Set by the worker, applied by the main loop
+        self.solve_status = ""
 
-    def draw_generate_button(self):
+        # Rendering state: glyphs and the static background are drawn once,
+        # and each frame only repaints what differs from what is on screen
+        self.glyphs = [None] + [
+            self.font.render(symbol, True, self.BLACK)
+            for symbol in SYMBOLS[: self.size]
+        ]  # Digit surfaces, indexed by digit
+        self.unsolvable_text = self.message_font.render(
+            "Board can't be solved", True, self.BLACK
+        )
+        self.unsolvable_rect = self.unsolvable_text.get_rect(
+            center=(self.WIDTH // 2, self.HEIGHT + 80)
+        )
+        self.status_rect = pygame.Rect(0, self.HEIGHT + 165, self.WIDTH, 35)
+        self.background = pygame.Surface(self.screen.get_size())
+        self.background.fill(self.WHITE)
+        self.draw_grid(self.background)
+        self.draw_mode_buttons(self.background)
+        self.draw_generate_button(self.background)
+        self.shown_grid = None  # Board as last drawn; None repaints everything
+        self.shown_messages = None
+        pygame.event.set_blocked(pygame.MOUSEMOTION)  # Nothing reacts to hovering
+
+    def draw_generate_button(self, surface):
         # Draw generate button
-        pygame.draw.rect(self.screen, self.GRAY, self.generate_button)
+        pygame.draw.rect(surface, self.GRAY, self.generate_button)
         generate_text = self.mode_buttons_font.render(
             "Generate Puzzle", True, self.BLACK
         )
         generate_text_rect = generate_text.get_rect(center=self.generate_button.center)
-        self.screen.blit(generate_text, generate_text_rect)
+        surface.blit(generate_text, generate_text_rect)
 
     def handle_generate_button_click(self, pos):
         # Handle generate button click
@@ -88,31 +137,65 @@ class GUI:
             self.generate_new_puzzle()  # Call method to generate new puzzle
 
     def generate_new_puzzle(self):
-        self.grid = self.generator.generate_puzzle()  # Generate new puzzle
+        if self.generate_thread is not None:
+            return
+        if self.pool is not None:
+            grid = self.pool.pop(self.difficulty)  # Take a ready puzzle
+            if grid is not None:
+                self.show_puzzle(grid)
+                return
+        # The pool has run dry (as on a first launch), or larger boards have
+        # none and take seconds to dig: wait on a worker like solves do
+        self.generate_thread = threading.Thread(target=self.run_generator, daemon=True)
+        self.generate_thread.start()
+        self.solve_status = "Generating puzzle..."
+
+    def run_generator(self):
+        if self.pool is not None:
+            # The pool's refill thread generates it; None if the pool stops
+            self.generated = self.pool.pop(self.difficulty, timeout=None)
+        else:
+            self.generated = self.generator.generate_puzzle()
 
-    def draw_mode_buttons(self):
+    # Called every frame: show a generated puzzle once the worker is done
+    def poll_generate(self):
+        if self.generate_thread is None or self.generate_thread.is_alive():
+            return
+        self.generate_thread = None
+        self.solve_status = ""
+        if self.generated is not None:
+            self.show_puzzle(np.array(self.generated))
+
+    # Put a new puzzle on the board, unlocked and with no solve result shown
+    def show_puzzle(self, grid):
+        self.grid = grid
+        self.solved = False
+        self.board_unsolvable = False
+        self.solve_status = ""
+
+    def draw_mode_buttons(self, surface):
         # Mode 1 button
-        pygame.draw.rect(self.screen, self.mode_buttons_color, self.mode1_button)
+        pygame.draw.rect(surface, self.mode_buttons_color, self.mode1_button)
         mode1_text = self.mode_buttons_font.render(
             "Mode 1", True, self.mode_buttons_text_color
         )
         mode1_text_rect = mode1_text.get_rect(center=self.mode1_button.center)
-        self.screen.blit(mode1_text, mode1_text_rect)
+        surface.blit(mode1_text, mode1_text_rect)
 
         # Mode 2 button
-        pygame.draw.rect(self.screen, self.mode_buttons_color, self.mode2_button)
+        pygame.draw.rect(surface, self.mode_buttons_color, self.mode2_button)
         mode2_text = self.mode_buttons_font.render(
             "Mode 2", True, self.mode_buttons_text_color
         )
         mode2_text_rect = mode2_text.get_rect(center=self.mode2_button.center)
-        self.screen.blit(mode2_text, mode2_text_rect)
+        surface.blit(mode2_text, mode2_text_rect)
 
-        pygame.draw.rect(self.screen, self.mode_buttons_color, self.mode3_button)
+        pygame.draw.rect(surface, self.mode_buttons_color, self.mode3_button)
         mode3_text = self.mode_buttons_font.render(
             "Mode 3", True, self.mode_buttons_text_color
         )
         mode3_text_rect = mode3_text.get_rect(center=self.mode3_button.center)
-        self.screen.blit(mode3_text, mode3_text_rect)
+        surface.blit(mode3_text, mode3_text_rect)
 
     def handle_mode_buttons_click(self, pos):
         if self.mode1_button.collidepoint(pos):
@@ -122,111 +205,196 @@ class GUI:
         elif self.mode2_button.collidepoint(pos):
             self.solved = False
             self.mode = 2
-            self.grid = np.zeros((9, 9), dtype=int)
+            self.grid = np.zeros((self.size, self.size), dtype=int)
             print("Mode 2 selected")
         elif self.mode3_button.collidepoint(pos):
             self.solved = False
             self.mode = 3
-            self.grid = np.zeros((9, 9), dtype=int)
+            self.grid = np.zeros((self.size, self.size), dtype=int)
             print("Mode 3 selected")
 
-    def draw_grid(self):
-        for i in range(10):
-            if i % 3 == 0:
+    def draw_grid(self, surface):
+        for i in range(self.size + 1):
+            if i % self.box == 0:
                 thickness = 5
             else:
                 thickness = 1
             pygame.draw.line(
-                self.screen,
+                surface,
                 self.BLACK,
                 (i * self.cell_size, 0),
                 (i * self.cell_size, self.HEIGHT),
                 thickness,
             )
             pygame.draw.line(
-                self.screen,
+                surface,
                 self.BLACK,
                 (0, i * self.cell_size),
                 (self.WIDTH, i * self.cell_size),
                 thickness,
             )
 
+    # Repaint the cells whose digit changed since the last frame; returns
+    # their rects
     def draw_number(self):
-        for i in range(9):
-            for j in range(9):
-                if self.grid[i][j] != 0:
-                    number = self.font.render(str(self.grid[i][j]), True, self.BLACK)
-                    self.screen.blit(
-                        number, (j * self.cell_size + 20, i * self.cell_size + 20)
-                    )
+        shown = self.shown_grid
+        if shown is None:
+            shown = np.zeros((self.size, self.size), dtype=int)
+        dirty = []
+        for i, j in zip(*np.nonzero(self.grid != shown)):
+            rect = pygame.Rect(
+                j * self.cell_size, i * self.cell_size, self.cell_size, self.cell_size
+            )
+            self.screen.blit(self.background, rect, rect)  # Clear the old digit
+            digit = self.grid[i][j]
+            if digit:
+                glyph = self.glyphs[digit]
+                self.screen.blit(glyph, glyph.get_rect(center=rect.center))
+            dirty.append(rect)
+        self.shown_grid = self.grid.copy()
+        return dirty
+
+    def solving(self):
+        return self.solve_thread is not None
 
+    # Start solving the board on a worker thread so the render loop keeps
+    # running; poll_solve applies the result once it is ready
     def solve_sudoku(self):
-        csp = CSP(
-            variables=[(i, j) for i in range(9) for j in range(9)],
-            domains={(i, j): list(range(1, 10)) for i in range(9) for j in range(9)},
-            constraints=[
-                ((var_i_row, var_i_col), (var_j_row, var_j_col))
-                for var_i_row in range(9)
-                for var_i_col in range(9)
-                for var_j_row in range(9)
-                for var_j_col in range(9)
-                if (var_i_row != var_j_row or var_i_col != var_j_col)
-                and (
-                    var_i_row == var_j_row
-                    or var_i_col == var_j_col
-                    or (
-                        var_i_row // 3 == var_j_row // 3
-                        and var_i_col // 3 == var_j_col // 3
-                    )
-                )
-            ],
+        if self.solving():
+            return
+        # A fresh solver per solve, so cancelling one never affects the next
+        self.solver = SudokuSolver()
+        self.solve_outcome = None
+        self.solve_started = time.time()
+        self.board_unsolvable = False
+        self.solve_thread = threading.Thread(
+            target=self.run_solver,
+            args=(self.solver, self.grid.copy()),
+            daemon=True,
         )
+        self.solve_thread.start()
 
-        for i in range(9):
-            for j in range(9):
-                if self.grid[i][j] != 0:
-                    csp.domains[(i, j)] = [self.grid[i][j]]
+    # Worker thread body: only hands the outcome back, never touches the board
+    def run_solver(self, solver, grid):
+        try:
+            solution = self.solutions.solve(
+                grid, lambda grid: solver.solve(grid, timeout=self.solve_timeout)
+            )
+            self.solve_outcome = ("solved", solution)
+        except SolveTimeout:
+            self.solve_outcome = ("timeout", None)
+        except SolveCancelled:
+            self.solve_outcome = ("cancelled", None)
 
-        start_time = time.time()
-        solution = csp.solve()
-        end_time = time.time()
+    def cancel_solve(self):
+        if self.solving():
+            self.solver.cancel()
 
-        if solution:
-            for i in range(9):
-                for j in range(9):
-                    self.grid[i][j] = solution[(i, j)]
-        else:
+    # Called every frame: apply a finished solve, or refresh the progress line
+    def poll_solve(self):
+        if not self.solving():
+            return
+        elapsed = time.time() - self.solve_started
+        if self.solve_thread.is_alive():
+            rate = self.solver.nodes / elapsed if elapsed else 0
+            self.solve_status = (
+                f"Solving... {self.solver.nodes} nodes, {rate:.0f} nodes/s, "
+                f"depth {self.solver.depth} (Esc to cancel)"
+            )
+            return
+        self.solve_thread = None
+        outcome, solution = self.solve_outcome
+        if outcome == "solved" and solution:
+            for i in range(self.size):
+                for j in range(self.size):
+                    self.grid[i][j] = solution[i][j]
+            self.solved = True
+            self.solve_status = f"Solved in {elapsed:.3f} s"
+        elif outcome == "solved":
             self.board_unsolvable = True
+            self.solve_status = ""
+        elif outcome == "timeout":
+            self.solve_status = f"Gave up after {self.solve_timeout:g} s"
+        else:
+            self.solve_status = "Solve cancelled"
+        print("Run Time: ", elapsed, " Seconds")
+
+    # Repaint the "can't be solved" message and the status line if either
+    # changed since the last frame; returns their rects
+    def draw_solve_status(self):
+        messages = (self.board_unsolvable, self.solve_status)
+        if messages == self.shown_messages:
+            return []
+        self.shown_messages = messages
+        for rect in (self.unsolvable_rect, self.status_rect):
+            self.screen.blit(self.background, rect, rect)
+        if self.board_unsolvable:
+            self.screen.blit(self.unsolvable_text, self.unsolvable_rect)
+        if self.solve_status:
+            text = self.mode_buttons_font.render(self.solve_status, True, self.BLACK)
+            text_rect = text.get_rect(center=self.status_rect.center)
+            self.screen.blit(text, text_rect)
+        return [self.unsolvable_rect, self.status_rect]
 
-        csp.print_arc_trees()
-        print("Run Time: ", end_time - start_time, " Seconds")
+    # Bring the window up to date, sending only the changed areas to the
+    # display
+    def draw(self):
+        if self.shown_grid is None:
+            self.screen.blit(self.background, (0, 0))
+            self.shown_messages = None
+            self.draw_number()
+            self.draw_solve_status()
+            pygame.display.flip()
+            return
+        dirty = self.draw_number() + self.draw_solve_status()
+        if dirty:
+            pygame.display.update(dirty)
+
+    # Events to handle this frame. With no worker running nothing changes
+    # until the user acts, so this blocks instead of polling and an idle board
+    # costs no CPU.
+    def wait_events(self):
+        if self.solving() or self.generate_thread is not None:
+            return pygame.event.get()
+        return [pygame.event.wait()] + pygame.event.get()
 
     def fill_grid(self, row, col, value):
-        if 0 <= row < 9 and 0 <= col < 9 and 0 <= value <= 9:
+        if 0 <= row < self.size and 0 <= col < self.size and 0 <= value <= self.size:
             self.grid[row][col] = value
 
     def check_validity(self, row, col):
-        for x in range(9):
-            if self.grid[row][col] == self.grid[row][x] and x != col:
-                self.grid[row][col] = 0
-                return False
-            if self.grid[row][col] == self.grid[x][col] and x != row:
-                self.grid[row][col] = 0
-                return False
-            box_x = col // 3
-            box_y = row // 3
-            for m in range(box_y * 3, box_y * 3 + 3):
-                for n in range(box_x * 3, box_x * 3 + 3):
-                    if self.grid[row][col] == self.grid[m][n] and (m, n) != (row, col):
-                        self.grid[row][col] = 0
-                        return False
+        # The rest of the board is kept valid, so the whole-grid check only
+        # fails on conflicts with the new entry
+        if not is_valid_grid(self.grid):
+            self.grid[row][col] = 0
+            return False
         return True
 
+    # The digit a key press enters: 0 to clear, 1-9, then letters for digits
+    # above 9 on larger boards. None for any other key.
+    def key_value(self, event):
+        symbol = event.unicode.upper()
+        if symbol == "0":
+            return 0
+        if symbol and symbol in SYMBOLS[: self.size]:
+            return SYMBOLS.index(symbol) + 1
+        return None
+
     def handle_events(self):
-        for event in pygame.event.get():
+        for event in self.wait_events():
             if event.type == pygame.QUIT:
+                self.cancel_solve()
+                if self.pool is not None:
+                    self.pool.stop()
+                self.solutions.close()
                 pygame.quit()
                 quit()
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                self.shown_grid = None  # Uncovered: repaint the whole window
+            elif self.solving() or self.generate_thread is not None:
+                # The board is locked until the worker finishes
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                    self.cancel_solve()
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 mouse_pos = pygame.mouse.get_pos()
                 if (
@@ -244,76 +412,32 @@ class GUI:
                     self.selected_row = mouse_y // self.cell_size
                     self.selected_col = mouse_x // self.cell_size
             elif event.type == pygame.KEYDOWN:
+                value = self.key_value(event)
                 if event.key == pygame.K_SPACE:
-                    self.solved = True
                     self.solve_sudoku()
-                elif (
-                    event.key
-                    in [
-                        pygame.K_0,
-                        pygame.K_1,
-                        pygame.K_2,
-                        pygame.K_3,
-                        pygame.K_4,
-                        pygame.K_5,
-                        pygame.K_6,
-                        pygame.K_7,
-                        pygame.K_8,
-                        pygame.K_9,
-                    ]
-                    and self.mode == 2
-                    and not self.solved
-                ):
+                elif value is not None and self.mode == 2 and not self.solved:
                     if self.selected_row is not None and self.selected_col is not None:
-                        self.fill_grid(
-                            self.selected_row, self.selected_col, int(event.unicode)
-                        )
-                elif (
-                    (
-                        event.key
-                        in [
-                            pygame.K_0,
-                            pygame.K_1,
-                            pygame.K_2,
-                            pygame.K_3,
-                            pygame.K_4,
-                            pygame.K_5,
-                            pygame.K_6,
-                            pygame.K_7,
-                            pygame.K_8,
-                            pygame.K_9,
-                        ]
-                    )
-                    and self.mode == 3
-                    and not self.solved
-                ):
+                        self.fill_grid(self.selected_row, self.selected_col, value)
+                elif value is not None and self.mode == 3 and not self.solved:
                     if self.selected_row is not None and self.selected_col is not None:
-                        self.fill_grid(
-                            self.selected_row, self.selected_col, int(event.unicode)
-                        )
+                        self.fill_grid(self.selected_row, self.selected_col, value)
                         if self.check_validity(self.selected_row, self.selected_col):
                             print("Entry is valid!")
                         else:
                             print("Entry violates Sudoku rules!")
-        pygame.display.flip()
 
     def main(self):
         clock = pygame.time.Clock()
         running = True
         while running:
-            self.screen.fill(self.WHITE)
-            self.draw_grid()
-            self.draw_number()
-            self.draw_mode_buttons()
-            self.draw_generate_button()  # Draw generate button
-            if self.board_unsolvable:
-                text = self.font.render("Board can't be solved", True, self.BLACK)
-                text_rect = text.get_rect(center=(self.WIDTH // 2, self.HEIGHT + 80))
-                self.screen.blit(text, text_rect)
+            self.poll_solve()
+            self.poll_generate()
+            self.draw()
             self.handle_events()
-            clock.tick(30)
+            clock.tick(30)  # Frame cap while a worker is running
 
 
 if __name__ == "__main__":
-    gui = GUI()
+    # Optional box size argument: python GUI.py 4 opens a 16x16 board
+    gui = GUI(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
     gui.main()
@@ -1,105 +1,262 @@
 import random
-from CSP import CSP
-import numpy as np
+from Grader import DIFFICULTIES, SudokuGrader
+from Solver import SolveTimeout, SudokuSolver
+from Template import box_of
 
 
-class SudokuGenerator:
-    def __init__(self):
-        self.solved_grid = np.array(
-            [
-                [5, 3, 0, 0, 7, 0, 0, 0, 0],
-                [6, 0, 0, 1, 9, 5, 0, 0, 0],
-                [0, 9, 8, 0, 0, 0, 0, 6, 0],
-                [8, 0, 0, 0, 6, 0, 0, 0, 3],
-                [4, 0, 0, 8, 0, 3, 0, 0, 1],
-                [7, 0, 0, 0, 2, 0, 0, 0, 6],
-                [0, 6, 0, 0, 0, 0, 2, 8, 0],
-                [0, 0, 0, 4, 1, 9, 0, 0, 5],
-                [0, 0, 0, 0, 8, 0, 0, 7, 9],
-            ]
-        )
+# Generated grids are handed out as NumPy arrays. NumPy is imported with the
+# first one rather than with this module, so processes that only solve never
+# pay for loading it.
+def as_array(grid):
+    import numpy as np
+
+    return np.array(grid)
+
+
+# Ways generate_complete_puzzle can build a full grid
+COMPLETE_METHODS = ("transform", "search")
+
 
-    def generate_complete_puzzle(self):
-        csp = CSP(
-            variables=[(i, j) for i in range(9) for j in range(9)],
-            domains={(i, j): list(range(1, 10)) for i in range(9) for j in range(9)},
-            constraints=[
-                ((var_i_row, var_i_col), (var_j_row, var_j_col))
-                for var_i_row in range(9)
-                for var_i_col in range(9)
-                for var_j_row in range(9)
-                for var_j_col in range(9)
-                if (var_i_row != var_j_row or var_i_col != var_j_col)
-                and (
-                    var_i_row == var_j_row
-                    or var_i_col == var_j_col
-                    or (
-                        var_i_row // 3 == var_j_row // 3
-                        and var_i_col // 3 == var_j_col // 3
+class PuzzleDigger:
+    # Incremental puzzle reduction. Starting from a uniquely solvable grid (a
+    # full solution, typically) it removes givens one at a time while keeping
+    # the solution unique. The digits present in every row, column and box are
+    # updated in place between removals, so most removals are settled by
+    # single checks, and the rest need one search rather than a full count.
+    # With check_timeout, a search running longer than that many seconds is
+    # given up and the given kept: the puzzle ends up with a few more clues
+    # but stays unique, and digging a large grid takes bounded time.
+    def __init__(self, grid, solver, check_timeout=None):
+        self.solver = solver
+        self.check_timeout = check_timeout
+        self.puzzle = [[int(value) for value in row] for row in grid]
+        self.box = box_of(self.puzzle)
+        self.size = size = self.box * self.box
+        self.all_digits = (1 << (size + 1)) - 2
+        self.row_digits = [0] * size
+        self.col_digits = [0] * size
+        self.box_digits = [0] * size
+        for row in range(size):
+            for col in range(size):
+                if self.puzzle[row][col]:
+                    self.toggle(row, col, self.puzzle[row][col])
+
+    # Flip digit's bit in the masks of the row, column and box of a cell
+    def toggle(self, row, col, digit):
+        bit = 1 << digit
+        self.row_digits[row] ^= bit
+        self.col_digits[col] ^= bit
+        self.box_digits[self.box_index(row, col)] ^= bit
+
+    def box_index(self, row, col):
+        return (row // self.box) * self.box + col // self.box
+
+    # Remove the given at (row, col) if the solution stays unique; returns
+    # whether it was removed
+    def try_remove(self, row, col):
+        digit = self.puzzle[row][col]
+        self.puzzle[row][col] = 0
+        self.toggle(row, col, digit)
+        if not self.still_unique(row, col, digit):
+            self.puzzle[row][col] = digit  # Revert the removal
+            self.toggle(row, col, digit)
+            return False
+        return True
+
+    # Whether digit is blocked by the givens from every other empty cell of one
+    # of the units of (row, col), so the cell is the only place left for it
+    def hidden_single(self, row, col, digit):
+        bit = 1 << digit
+        box, size = self.box, self.size
+        box_row, box_col = row - row % box, col - col % box
+        units = (
+            [(row, c) for c in range(size)],
+            [(r, col) for r in range(size)],
+            [(box_row + i, box_col + j) for i in range(box) for j in range(box)],
+        )
+        for unit in units:
+            for r, c in unit:
+                if (r, c) != (row, col) and self.puzzle[r][c] == 0:
+                    seen = (
+                        self.row_digits[r]
+                        | self.col_digits[c]
+                        | self.box_digits[self.box_index(r, c)]
                     )
-                )
-            ],
+                    if not seen & bit:
+                        break  # digit could still go in (r, c)
+            else:
+                return True
+        return False
+
+    # The puzzle was unique before digit was removed from (row, col), so any
+    # second solution must put a different digit there
+    def still_unique(self, row, col, digit):
+        seen = (
+            self.row_digits[row]
+            | self.col_digits[col]
+            | self.box_digits[self.box_index(row, col)]
         )
+        if seen | (1 << digit) == self.all_digits:
+            return True  # Naked single: every other digit is already a peer
+        if self.hidden_single(row, col, digit):
+            return True
+        excluded = [(row, col, digit)]
+        try:
+            return self.solver.solve(self.puzzle, excluded, self.check_timeout) is None
+        except SolveTimeout:
+            return False
 
-        # Solve the puzzle
-        solution = csp.solve()
+
+class SudokuGenerator:
+    # seed makes every random choice (grids, removals, clue counts) reproducible
+    # box sets the grid size: 3 for 9x9 (the default), 4 for 16x16, 5 for 25x25
+    def __init__(self, seed=None, box=3):
+        self.random = random.Random(seed)
+        self.box = box
+        self.size = box * box
+        # Uniqueness checks on 16x16 and larger grids can run for seconds near
+        # the minimal clue count, so they are cut short there
+        self.check_timeout = None if box <= 3 else 0.02
+        # Replaced by the last complete grid generated; a plain list until
+        # then so constructing a generator does not load NumPy
+        self.solved_grid = [
+            [5, 3, 0, 0, 7, 0, 0, 0, 0],
+            [6, 0, 0, 1, 9, 5, 0, 0, 0],
+            [0, 9, 8, 0, 0, 0, 0, 6, 0],
+            [8, 0, 0, 0, 6, 0, 0, 0, 3],
+            [4, 0, 0, 8, 0, 3, 0, 0, 1],
+            [7, 0, 0, 0, 2, 0, 0, 0, 6],
+            [0, 6, 0, 0, 0, 0, 2, 8, 0],
+            [0, 0, 0, 4, 1, 9, 0, 0, 5],
+            [0, 0, 0, 0, 8, 0, 0, 7, 9],
+        ]
+        self.solver = SudokuSolver()
+        self.grader = SudokuGrader()
+        self.random_solver = SudokuSolver(rng=self.random)
+
+    # Build a random complete grid. "transform" shuffles a canonical grid with
+    # validity-preserving symmetries; "search" solves the empty board with
+    # randomized value ordering, which can reach any grid but is slower.
+    def generate_complete_puzzle(self, method="transform"):
+        if method == "transform":
+            solution = self.transformed_grid()
+        elif method == "search":
+            empty = [[0] * self.size for _ in range(self.size)]
+            solution = self.random_solver.solve(empty)
+        else:
+            raise ValueError(f"Unknown generation method: {method}")
 
         if solution:
-            for i in range(9):
-                for j in range(9):
-                    self.solved_grid[i][j] = solution[(i, j)]
+            self.solved_grid = as_array(solution)
             return self.solved_grid
         else:
             return None
 
+    def transformed_grid(self):
+        rng, box, size = self.random, self.box, self.size
+        # Canonical grid: each row is the previous one shifted, by box within
+        # a band and by 1 between bands
+        base = [
+            [(box * (r % box) + r // box + c) % size for c in range(size)]
+            for r in range(size)
+        ]
+        # Relabel digits, permute bands and the rows inside each band, and the
+        # same for stacks and columns, then transpose half of the time
+        digits = rng.sample(range(1, size + 1), size)
+        rows = [
+            box * band + r
+            for band in rng.sample(range(box), box)
+            for r in rng.sample(range(box), box)
+        ]
+        cols = [
+            box * stack + c
+            for stack in rng.sample(range(box), box)
+            for c in rng.sample(range(box), box)
+        ]
+        grid = [[digits[base[r][c]] for c in cols] for r in rows]
+        if rng.random() < 0.5:
+            grid = [list(column) for column in zip(*grid)]
+        return grid
+
     def remove_elements(self, solved_grid, num_remove):
         if solved_grid is None:
             print("Generate a complete puzzle first.")
             return
 
-        # Randomly remove elements while ensuring puzzle remains solvable
-        for _ in range(num_remove):
-            row, col = random.randint(0, 8), random.randint(0, 8)
-            if solved_grid[row, col] != 0:  # Ensure the cell is not already empty
-                original_value = solved_grid[row, col]
-                solved_grid[row, col] = 0  # Remove the value
-
-                # Check if the puzzle is still solvable after removal
-            if not self.is_puzzle_solvable(solved_grid):
-                # If not solvable, revert the change and try removing another cell
-                solved_grid[row, col] = original_value
-
+        digger = PuzzleDigger(solved_grid, self.solver, self.check_timeout)
+        self.dig(digger, num_remove)
+        solved_grid[:] = digger.puzzle
         return solved_grid
 
-    def is_puzzle_solvable(self, puzzle):
-        # Check if the puzzle is solvable by attempting to solve it
-        csp = CSP(
-            variables=[(i, j) for i in range(9) for j in range(9)],
-            domains={(i, j): list(range(1, 10)) for i in range(9) for j in range(9)},
-            constraints=[
-                ((var_i_row, var_i_col), (var_j_row, var_j_col))
-                for var_i_row in range(9)
-                for var_i_col in range(9)
-                for var_j_row in range(9)
-                for var_j_col in range(9)
-                if (var_i_row != var_j_row or var_i_col != var_j_col)
-                and (
-                    var_i_row == var_j_row
-                    or var_i_col == var_j_col
-                    or (
-                        var_i_row // 3 == var_j_row // 3
-                        and var_i_col // 3 == var_j_col // 3
-                    )
-                )
-            ],
-        )
-        solution = csp.solve()
-        return solution is not None
+    # Try every filled cell once, in random order, keeping each removal that
+    # leaves the solution unique, until num_remove cells have been emptied
+    def dig(self, digger, num_remove=None):
+        size = digger.size
+        cells = [(row, col) for row in range(size) for col in range(size)]
+        self.random.shuffle(cells)
+        removed = 0
+        for row, col in cells:
+            if num_remove is not None and removed == num_remove:
+                break
+            if digger.puzzle[row][col] != 0 and digger.try_remove(row, col):
+                removed += 1
 
-    def generate_puzzle(self):
+    # difficulty, one of Grader.DIFFICULTIES, asks for a puzzle in that band;
+    # without it the clue count is picked at random between 17 and 30 (scaled
+    # by the number of cells for other grid sizes)
+    def generate_puzzle(self, difficulty=None):
+        if difficulty is not None:
+            return self.generate_graded_puzzle(difficulty)
         solved_grid = self.generate_complete_puzzle()
         if solved_grid is not None:
-            no_elements = random.randint(17, 30)
-            return self.remove_elements(solved_grid, 81 - no_elements)
+            cells = self.size * self.size
+            no_elements = self.random.randint(
+                round(cells * 17 / 81), round(cells * 30 / 81)
+            )
+            return self.remove_elements(solved_grid, cells - no_elements)
         else:
             return None
+
+    # Index of the difficulty band of puzzle in Grader.DIFFICULTIES
+    def difficulty_level(self, puzzle):
+        return DIFFICULTIES.index(self.grader.hardest_technique(puzzle)[1])
+
+    # Dig a fresh grid down to a minimal unique puzzle without grading along
+    # the way, then grade it once. Too easy: the grid is dropped straight
+    # away. Too hard: givens are put back until it falls into the band. After
+    # max_attempts the closest puzzle found is returned.
+    def generate_graded_puzzle(self, difficulty, max_attempts=300):
+        target = DIFFICULTIES.index(difficulty)
+        closest, closest_distance = None, None
+        for _ in range(max_attempts):
+            solution = self.generate_complete_puzzle()
+            digger = PuzzleDigger(solution, self.solver, self.check_timeout)
+            self.dig(digger)
+            puzzle = digger.puzzle
+            reached = self.difficulty_level(puzzle)
+            if reached > target:
+                reached = self.ease_puzzle(puzzle, solution, target, reached)
+            if reached == target:
+                return as_array(puzzle)
+            if closest is None or abs(reached - target) < closest_distance:
+                closest, closest_distance = puzzle, abs(reached - target)
+        return as_array(closest)
+
+    # Put givens from solution back into puzzle, in random order, until its
+    # difficulty level comes down to target. A given that would take it below
+    # target is taken out again at once. Returns the level reached.
+    def ease_puzzle(self, puzzle, solution, target, level):
+        size = len(puzzle)
+        cells = [(row, col) for row in range(size) for col in range(size)]
+        self.random.shuffle(cells)
+        for row, col in cells:
+            if level == target:
+                break
+            if puzzle[row][col] == 0:
+                puzzle[row][col] = int(solution[row][col])
+                eased = self.difficulty_level(puzzle)
+                if eased < target:
+                    puzzle[row][col] = 0
+                else:
+                    level = eased
+        return level
@@ -0,0 +1,226 @@
+from collections import namedtuple
+from itertools import combinations
+from Domains import popcount
+from Solver import SudokuSolver
+from Template import box_of, geometry
+
+# Solving techniques from simplest to hardest, and the difficulty band each
+# one puts a puzzle in. "backtracking" means logic alone got stuck.
+TECHNIQUES = (
+    "naked_single",
+    "hidden_single",
+    "locked_candidates",
+    "naked_pair",
+    "hidden_pair",
+    "x_wing",
+    "swordfish",
+    "backtracking",
+)
+DIFFICULTY_OF = {
+    "naked_single": "easy",
+    "hidden_single": "easy",
+    "locked_candidates": "medium",
+    "naked_pair": "hard",
+    "hidden_pair": "hard",
+    "x_wing": "hard",
+    "swordfish": "hard",
+    "backtracking": "expert",
+}
+DIFFICULTIES = ("easy", "medium", "hard", "expert")
+
+# The hardest technique a puzzle needed, its difficulty band, and the search
+# nodes SudokuSolver took on it
+Grade = namedtuple("Grade", ["technique", "difficulty", "nodes"])
+
+
+class SudokuGrader:
+    # Rates a puzzle by solving it the way a person would: always apply the
+    # simplest technique that makes progress, and remember the hardest one
+    # that was ever needed.
+    def __init__(self):
+        self.solver = SudokuSolver()
+        self.steps = [
+            self.naked_single,
+            self.hidden_single,
+            self.locked_candidates,
+            self.naked_pair,
+            self.hidden_pair,
+            self.x_wing,
+            self.swordfish,
+        ]
+
+    def grade(self, grid):
+        self.solver.solve(grid)
+        return Grade(*self.hardest_technique(grid), self.solver.nodes)
+
+    # Name and difficulty band of the hardest technique needed to solve grid
+    def hardest_technique(self, grid):
+        shape = geometry(box_of(grid))
+        size = self.size = shape.size
+        self.cells = shape.cells
+        self.units, self.peers = shape.units, shape.peers
+        self.rows, self.cols = shape.units[:size], shape.units[size : 2 * size]
+        self.boxes = shape.units[2 * size :]
+        self.digits = range(1, size + 1)
+        self.all_digits = (1 << (size + 1)) - 2
+        self.values = [0] * shape.cells
+        self.candidates = [self.all_digits] * shape.cells
+        for cell in range(shape.cells):
+            digit = int(grid[cell // size][cell % size])
+            if digit:
+                if not self.candidates[cell] >> digit & 1:
+                    return "backtracking", "expert"  # Contradictory givens
+                self.place(cell, digit)
+        hardest = 0
+        while 0 in self.values:
+            if 0 in (
+                self.candidates[cell]
+                for cell in range(self.cells)
+                if not self.values[cell]
+            ):
+                return "backtracking", "expert"  # Logic reached a contradiction
+            for level, step in enumerate(self.steps):
+                if step():
+                    hardest = max(hardest, level)
+                    break
+            else:
+                hardest = len(self.steps)  # No technique applies
+                break
+        technique = TECHNIQUES[hardest]
+        return technique, DIFFICULTY_OF[technique]
+
+    def place(self, cell, digit):
+        self.values[cell] = digit
+        self.candidates[cell] = 0
+        for peer in self.peers[cell]:
+            self.candidates[peer] &= ~(1 << digit)
+
+    # Remove the digits in mask from every cell in cells; True if any changed
+    def eliminate(self, cells, mask):
+        changed = False
+        for cell in cells:
+            if self.candidates[cell] & mask:
+                self.candidates[cell] &= ~mask
+                changed = True
+        return changed
+
+    # Cells of unit where digit is still a candidate
+    def places(self, unit, digit):
+        bit = 1 << digit
+        return [cell for cell in unit if self.candidates[cell] & bit]
+
+    # Techniques: each applies itself once and returns whether it made progress
+
+    def naked_single(self):
+        for cell in range(self.cells):
+            mask = self.candidates[cell]
+            if mask and not mask & (mask - 1):
+                self.place(cell, mask.bit_length() - 1)
+                return True
+        return False
+
+    def hidden_single(self):
+        for unit in self.units:
+            for digit in self.digits:
+                places = self.places(unit, digit)
+                if len(places) == 1:
+                    self.place(places[0], digit)
+                    return True
+        return False
+
+    # Pointing: a digit confined to one row or column inside a box leaves the
+    # rest of that line. Claiming: a digit confined to one box inside a line
+    # leaves the rest of that box.
+    def locked_candidates(self):
+        for box in self.boxes:
+            for digit in self.digits:
+                places = self.places(box, digit)
+                if len(places) < 2:
+                    continue
+                for lines, line_of in (
+                    (self.rows, places[0] // self.size),
+                    (self.cols, places[0] % self.size),
+                ):
+                    line = lines[line_of]
+                    if all(cell in line for cell in places):
+                        others = [cell for cell in line if cell not in box]
+                        if self.eliminate(others, 1 << digit):
+                            return True
+        for line in self.rows + self.cols:
+            for digit in self.digits:
+                places = self.places(line, digit)
+                if len(places) < 2:
+                    continue
+                box = next(box for box in self.boxes if places[0] in box)
+                if all(cell in box for cell in places):
+                    others = [cell for cell in box if cell not in line]
+                    if self.eliminate(others, 1 << digit):
+                        return True
+        return False
+
+    # Two cells of a unit with the same two candidates own those digits
+    def naked_pair(self):
+        for unit in self.units:
+            pairs = [cell for cell in unit if popcount(self.candidates[cell]) == 2]
+            for first, second in combinations(pairs, 2):
+                mask = self.candidates[first]
+                if self.candidates[second] == mask:
+                    others = [cell for cell in unit if cell not in (first, second)]
+                    if self.eliminate(others, mask):
+                        return True
+        return False
+
+    # Two digits that can only go in the same two cells of a unit fill them
+    def hidden_pair(self):
+        for unit in self.units:
+            two_places = {}
+            for digit in self.digits:
+                places = tuple(self.places(unit, digit))
+                if len(places) == 2:
+                    two_places.setdefault(places, []).append(digit)
+            for places, digits in two_places.items():
+                if len(digits) == 2:
+                    keep = (1 << digits[0]) | (1 << digits[1])
+                    if self.eliminate(places, self.all_digits & ~keep):
+                        return True
+        return False
+
+    def x_wing(self):
+        return self.fish(2)
+
+    def swordfish(self):
+        return self.fish(3)
+
+    # Basic fish of the given size: when a digit's places in `size` lines all
+    # fall in `size` cross lines, it leaves every other cell of those cross lines
+    def fish(self, size):
+        for lines, cross_lines, cross_of in (
+            (self.rows, self.cols, 1),
+            (self.cols, self.rows, 0),
+        ):
+            for digit in self.digits:
+                bit = 1 << digit
+                spans = []
+                for line in lines:
+                    places = self.places(line, digit)
+                    if 2 <= len(places) <= size:
+                        spans.append(
+                            (
+                                line,
+                                {divmod(cell, self.size)[cross_of] for cell in places},
+                            )
+                        )
+                for group in combinations(spans, size):
+                    crosses = set().union(*(span for _, span in group))
+                    if len(crosses) != size:
+                        continue
+                    fish_cells = {cell for line, _ in group for cell in line}
+                    others = [
+                        cell
+                        for cross in crosses
+                        for cell in cross_lines[cross]
+                        if cell not in fish_cells
+                    ]
+                    if self.eliminate(others, bit):
+                        return True
+        return False
@@ -0,0 +1,118 @@
+import sqlite3
+import threading
+from collections import Counter, deque
+from Generator import SudokuGenerator, as_array
+from Grader import DIFFICULTIES
+from Template import grid_to_puzzle, puzzle_to_grid
+
+
+class PuzzlePool:
+    # Keeps `size` ready puzzles per difficulty so a request never waits for
+    # generation. Puzzles are held in deques for O(1) pops and mirrored in a
+    # SQLite file so the pool survives restarts; a daemon thread refills
+    # whatever runs low. Only that thread ever uses the pool's generator.
+    def __init__(self, path="puzzle_pool.sqlite3", size=10, seed=None):
+        self.size = size
+        self.generator = SudokuGenerator(seed)
+        self.ready = {difficulty: deque() for difficulty in DIFFICULTIES}
+        self.lock = threading.Lock()  # Guards ready, wanted and the connection
+        self.available = threading.Condition(self.lock)  # A puzzle was added
+        self.wanted = Counter()  # Difficulty -> pops waiting for one
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+        self.worker = None
+
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        # WAL without a sync per commit keeps a pop's DELETE off the disk's
+        # critical path; a crash can at worst replay a few served puzzles
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS puzzles "
+            "(id INTEGER PRIMARY KEY, difficulty TEXT NOT NULL, puzzle TEXT NOT NULL)"
+        )
+        self.connection.commit()
+        rows = self.connection.execute(
+            "SELECT id, difficulty, puzzle FROM puzzles ORDER BY id"
+        )
+        for row_id, difficulty, puzzle in rows:
+            if difficulty in self.ready:
+                self.ready[difficulty].append((row_id, puzzle))
+
+    # Start the background refill thread
+    def start(self):
+        if self.worker is None:
+            self.worker = threading.Thread(target=self.refill_forever, daemon=True)
+            self.worker.start()
+        return self
+
+    # Stop the refill thread (after the puzzle it is working on) and close
+    # the database. Pops still waiting return None.
+    def stop(self):
+        self.stopped.set()
+        self.wakeup.set()
+        with self.available:
+            self.available.notify_all()
+        if self.worker is not None:
+            self.worker.join()
+            self.worker = None
+        self.connection.close()
+
+    # Take a puzzle of the given difficulty as a 9x9 array. Normally an O(1)
+    # pop. Puzzles are never generated on the caller's thread: if the pool has
+    # run dry, wait up to timeout seconds (None: until one is ready) for the
+    # refill thread, which then works on this difficulty first, and return
+    # None if it has not delivered one by then.
+    def pop(self, difficulty="medium", timeout=0):
+        with self.available:
+            if not self.ready[difficulty] and timeout != 0:
+                self.wanted[difficulty] += 1
+                self.wakeup.set()
+                self.available.wait_for(
+                    lambda: self.ready[difficulty] or self.stopped.is_set(), timeout
+                )
+                self.wanted[difficulty] -= 1
+            if self.ready[difficulty]:
+                row_id, puzzle = self.ready[difficulty].popleft()
+                self.connection.execute("DELETE FROM puzzles WHERE id = ?", (row_id,))
+                self.connection.commit()
+            else:
+                puzzle = None
+        self.wakeup.set()  # Let the worker top the pool back up
+        if puzzle is None:
+            return None
+        return as_array(puzzle_to_grid(puzzle))
+
+    # Number of ready puzzles per difficulty
+    def counts(self):
+        with self.lock:
+            return {difficulty: len(ready) for difficulty, ready in self.ready.items()}
+
+    # Add one freshly generated puzzle to a difficulty a pop is waiting for,
+    # else to the lowest stocked one. Returns False when every difficulty is
+    # already full.
+    def refill_one(self):
+        with self.lock:
+            difficulty, count = min(
+                ((difficulty, len(ready)) for difficulty, ready in self.ready.items()),
+                key=lambda item: (not self.wanted[item[0]], item[1]),
+            )
+        if count >= self.size:
+            return False
+        # Generate outside the lock so pops are never held up
+        puzzle = grid_to_puzzle(self.generator.generate_puzzle(difficulty))
+        with self.available:
+            cursor = self.connection.execute(
+                "INSERT INTO puzzles (difficulty, puzzle) VALUES (?, ?)",
+                (difficulty, puzzle),
+            )
+            self.connection.commit()
+            self.ready[difficulty].append((cursor.lastrowid, puzzle))
+            self.available.notify_all()
+        return True
+
+    def refill_forever(self):
+        while not self.stopped.is_set():
+            if not self.refill_one():
+                self.wakeup.wait()  # Sleep until a pop makes room
+                self.wakeup.clear()
@@ -0,0 +1,93 @@
+import gzip
+import mmap
+import sys
+from array import array
+
+
+# Open a puzzle file for text reading or writing; ".gz" files are gzip
+# compressed and "-" is stdin/stdout
+def open_puzzle_file(path, mode="r"):
+    if path == "-":
+        return sys.stdout if "w" in mode or "a" in mode else sys.stdin
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode + "t")
+    return open(path, mode)
+
+
+# Lazily yield the puzzles of a one-puzzle-per-line file. Blank lines and
+# lines starting with "#" are skipped. Only one line is held in memory.
+def read_puzzles(path):
+    source = open_puzzle_file(path)
+    try:
+        for line in source:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+
+# Write puzzle strings one per line as they arrive; returns the count written
+def write_puzzles(path, puzzles):
+    target = open_puzzle_file(path, "w")
+    count = 0
+    try:
+        for puzzle in puzzles:
+            target.write(puzzle)
+            target.write("\n")
+            count += 1
+    finally:
+        if target is not sys.stdout:
+            target.close()
+    return count
+
+
+class PuzzleIndex:
+    # Random access to the puzzles of an uncompressed puzzle file through
+    # mmap. Blank and "#" lines are skipped exactly as read_puzzles skips
+    # them, so index i is the i-th puzzle read_puzzles yields (and the index
+    # of its Batch.SolveResult). Building the index scans the file once and
+    # keeps one 8-byte offset per puzzle; the file contents themselves stay
+    # in the page cache.
+    def __init__(self, path):
+        if str(path).endswith(".gz"):
+            raise ValueError("Random access needs an uncompressed file")
+        self.file = open(path, "rb")
+        self.offsets = array("Q")
+        self.map = None
+        if self.file.seek(0, 2) == 0:
+            return  # mmap cannot map an empty file
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        position = 0
+        size = len(self.map)
+        while position < size:
+            end = self.map.find(b"\n", position)
+            if end == -1:
+                end = size
+            line = self.map[position:end].strip()
+            if line and not line.startswith(b"#"):
+                self.offsets.append(position)
+            position = end + 1
+
+    def __len__(self):
+        return len(self.offsets)
+
+    # The puzzle at index (0-based), without its line ending
+    def __getitem__(self, index):
+        start = self.offsets[index]
+        end = self.map.find(b"\n", start)
+        if end == -1:
+            end = len(self.map)
+        return self.map[start:end].decode().strip()
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
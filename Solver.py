@@ -0,0 +1,369 @@
+import time
+from Domains import iter_bits
+from Template import box_of, geometry
+
+BACKENDS = ("auto", "propagation", "dlx")
+
+
+class SolveCancelled(Exception):
+    # Raised out of a solve when SudokuSolver.cancel is called
+    pass
+
+
+class SolveTimeout(SolveCancelled):
+    # Raised out of a solve that ran past its timeout
+    pass
+
+
+class SudokuSolver:
+    # Dedicated n x n Sudoku solver (9x9, 16x16, 25x25, ...); the grid size is
+    # taken from each grid it is given. backend selects the algorithm:
+    # "propagation" - naked/hidden singles on candidate bitmasks, plus MRV search
+    # "dlx" - Knuth's Algorithm X over the exact cover matrix with dancing links
+    # "auto" - propagation for 9x9, where it is fastest, and dlx for larger
+    # grids, where branching on the tightest row/column/box constraint rather
+    # than the tightest cell keeps the search small
+    # rng, a random.Random, shuffles the order digits are tried in
+    def __init__(self, backend="auto", rng=None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown solver backend: {backend}")
+        self.backend = backend
+        self.rng = rng
+        self.nodes = 0  # Search nodes visited by the last solve
+        self.depth = 0  # Branching depth of the node being searched
+        # nodes and depth may be read from another thread to report progress;
+        # cancelled and deadline are checked once per node
+        self.cancelled = False
+        self.deadline = None
+
+    # Ask a running solve, possibly on another thread, to stop. The solve
+    # raises SolveCancelled at its next node; so does every later solve.
+    def cancel(self):
+        self.cancelled = True
+
+    def check_interrupt(self):
+        if self.cancelled:
+            raise SolveCancelled("Solve cancelled")
+        # Reading the clock on every node would dominate easy solves
+        if not self.nodes & 255 and time.perf_counter() > self.deadline:
+            raise SolveTimeout("Solve timed out")
+
+    # Solve a grid (0 for empty cells); returns the solved grid as a list
+    # of lists, or None if the puzzle has no solution. excluded and timeout
+    # are passed on to iter_solutions.
+    def solve(self, grid, excluded=(), timeout=None):
+        return next(self.iter_solutions(grid, excluded, timeout), None)
+
+    # Count the solutions of grid, stopping as soon as limit is reached.
+    # limit=2 tells a unique puzzle (1) from an ambiguous one (2).
+    def count_solutions(self, grid, limit=2):
+        count = 0
+        for _ in self.iter_solutions(grid):
+            count += 1
+            if count >= limit:
+                break
+        return count
+
+    # Yield each solution of grid as a list of lists. The search resumes where
+    # it left off, so propagation done above a branch is never repeated.
+    # excluded lists (row, col, digit) placements ruled out up front. With a
+    # timeout in seconds, SolveTimeout is raised once the search runs past it.
+    def iter_solutions(self, grid, excluded=(), timeout=None):
+        self.shape = shape = geometry(box_of(grid))
+        size = shape.size
+        # Candidates are bitmasks with bit d set when digit d (1..n) is still
+        # possible; all_digits is the full mask
+        self.all_digits = (1 << (size + 1)) - 2
+        givens = [int(value) for row in grid for value in row]
+        excluded = {(row * size + col, digit) for row, col, digit in excluded}
+        self.nodes = 0
+        self.depth = 0
+        self.deadline = None if timeout is None else time.perf_counter() + timeout
+        backend = self.backend
+        if backend == "auto":
+            backend = "propagation" if shape.box <= 3 else "dlx"
+        if backend == "dlx":
+            solutions = self.dlx_solutions(givens, excluded)
+        else:
+            solutions = self.propagation_solutions(givens, excluded)
+        for solution in solutions:
+            yield [solution[row * size : row * size + size] for row in range(size)]
+
+    # Propagation backend
+
+    def propagation_solutions(self, givens, excluded=()):
+        candidates = self.initial_candidates(givens)
+        if candidates is None:
+            return  # Givens contradict each other
+        for cell, digit in excluded:
+            if not self.eliminate(candidates, cell, digit):
+                return
+        for candidates in self.search(candidates):
+            yield [mask.bit_length() - 1 for mask in candidates]
+
+    # Candidates from the givens in one pass over the units, rather than one
+    # elimination cascade per given. Empty cells left with a single digit are
+    # then propagated; search and eliminate take care of everything else.
+    # Returns None if two givens clash or a cell has no candidate left.
+    def initial_candidates(self, givens):
+        shape = self.shape
+        unit_digits = [0] * len(shape.units)
+        for index, unit in enumerate(shape.units):
+            for cell in unit:
+                if givens[cell]:
+                    bit = 1 << givens[cell]
+                    if unit_digits[index] & bit:
+                        return None
+                    unit_digits[index] |= bit
+        candidates = []
+        for cell in range(shape.cells):
+            if givens[cell]:
+                candidates.append(1 << givens[cell])
+            else:
+                row, col, box = shape.unit_indexes_of[cell]
+                candidates.append(
+                    self.all_digits
+                    & ~(unit_digits[row] | unit_digits[col] | unit_digits[box])
+                )
+        for cell in range(shape.cells):
+            mask = candidates[cell]
+            if not givens[cell] and not mask & (mask - 1):
+                if not mask:
+                    return None
+                digit = mask.bit_length() - 1
+                for peer in shape.peers[cell]:
+                    if not self.eliminate(candidates, peer, digit):
+                        return None
+        return candidates
+
+    # Depth-first search on the cell with the fewest candidates, branching on a
+    # copy of the candidate list; yields each fully determined candidate list
+    def search(self, candidates, depth=0):
+        self.nodes += 1
+        self.depth = depth
+        if self.cancelled or self.deadline is not None:
+            self.check_interrupt()
+        best_cell, best_count = None, self.shape.size + 1
+        for cell, mask in enumerate(candidates):
+            if mask & (mask - 1):  # More than one candidate left
+                count = bin(mask).count("1")
+                if count < best_count:
+                    best_cell, best_count = cell, count
+                    if count == 2:
+                        break
+        if best_cell is None:
+            yield candidates  # Every cell is down to a single digit
+            return
+        digits = iter_bits(candidates[best_cell])
+        if self.rng is not None:
+            digits = list(digits)
+            self.rng.shuffle(digits)
+        for digit in digits:
+            branch = list(candidates)
+            if self.assign(branch, best_cell, digit):
+                yield from self.search(branch, depth + 1)
+
+    # Fix cell to digit by eliminating every other candidate
+    def assign(self, candidates, cell, digit):
+        for other in iter_bits(candidates[cell] & ~(1 << digit)):
+            if not self.eliminate(candidates, cell, other):
+                return False
+        return True
+
+    # Remove digit from cell and propagate naked and hidden singles. Returns
+    # False when a contradiction is reached.
+    def eliminate(self, candidates, cell, digit):
+        bit = 1 << digit
+        if not candidates[cell] & bit:
+            return True  # Already eliminated
+        remaining = candidates[cell] & ~bit
+        if not remaining:
+            return False  # Removed the last candidate
+        candidates[cell] = remaining
+        if not remaining & (remaining - 1):
+            # Naked single: the last digit left is removed from every peer
+            last_digit = remaining.bit_length() - 1
+            for peer in self.shape.peers[cell]:
+                if not self.eliminate(candidates, peer, last_digit):
+                    return False
+        for unit in self.shape.units_of[cell]:
+            # Hidden single: digit has one place left in the unit
+            places = [other for other in unit if candidates[other] & bit]
+            if not places:
+                return False
+            if len(places) == 1 and candidates[places[0]] != bit:
+                if not self.assign(candidates, places[0], digit):
+                    return False
+        return True
+
+    # DLX backend
+
+    def dlx_solutions(self, givens, excluded=()):
+        shape = self.shape
+        links = DancingLinks(4 * shape.cells)
+        # Rows are only built for digits no given rules out: the rest would be
+        # removed by the givens' selections anyway, and building the full
+        # matrix dominates the cost of a solve on large, mostly filled grids
+        unit_digits = [0] * len(shape.units)
+        for index, unit in enumerate(shape.units):
+            for cell in unit:
+                unit_digits[index] |= 1 << givens[cell]
+        rows = {}
+        for cell in range(shape.cells):
+            if givens[cell]:
+                digits = [givens[cell]]
+            else:
+                row, col, box = shape.unit_indexes_of[cell]
+                seen = unit_digits[row] | unit_digits[col] | unit_digits[box]
+                digits = list(iter_bits(self.all_digits & ~seen))
+            digits = [digit for digit in digits if (cell, digit) not in excluded]
+            if self.rng is not None:
+                self.rng.shuffle(digits)  # Row order is the order digits are tried
+            for digit in digits:
+                columns = exact_cover_columns(cell, digit, shape.box)
+                rows[links.add_row(columns)] = (cell, digit)
+        # Select the rows of the givens up front
+        for node, (cell, digit) in list(rows.items()):
+            if givens[cell]:
+                if not links.select(node):
+                    return  # Givens contradict each other
+        for nodes in links.search(self):
+            solution = list(givens)
+            for node in nodes:
+                cell, digit = rows[node]
+                solution[cell] = digit
+            yield solution
+
+
+# The four exact cover constraints satisfied by placing digit in cell of a grid
+# with the given box size: the cell is filled, and digit appears in its row,
+# its column and its box
+def exact_cover_columns(cell, digit, box=3):
+    size = box * box
+    cells = size * size
+    row, col = divmod(cell, size)
+    unit_box = (row // box) * box + col // box
+    return (
+        cell,
+        cells + row * size + digit - 1,
+        2 * cells + col * size + digit - 1,
+        3 * cells + unit_box * size + digit - 1,
+    )
+
+
+class DancingLinks:
+    # Toroidal doubly linked exact cover matrix held in parallel lists. Node 0
+    # is the root, nodes 1..n_columns are column headers, rows follow.
+    def __init__(self, n_columns):
+        headers = range(n_columns + 1)
+        self.left = [i - 1 for i in headers]
+        self.right = [i + 1 for i in headers]
+        self.left[0], self.right[n_columns] = n_columns, 0
+        self.up = list(headers)
+        self.down = list(headers)
+        self.column = list(headers)
+        self.size = [0] * (n_columns + 1)
+
+    # Append a row covering the given 0-based columns; returns its first node
+    def add_row(self, columns):
+        first = len(self.column)
+        for offset, col in enumerate(columns):
+            header = col + 1
+            node = first + offset
+            self.left.append(node - 1 if offset else first + len(columns) - 1)
+            self.right.append(node + 1 if offset < len(columns) - 1 else first)
+            self.up.append(self.up[header])
+            self.down.append(header)
+            self.down[self.up[header]] = node
+            self.up[header] = node
+            self.column.append(header)
+            self.size[header] += 1
+        return first
+
+    def cover(self, header):
+        left, right, up, down = self.left, self.right, self.up, self.down
+        right[left[header]] = right[header]
+        left[right[header]] = left[header]
+        i = down[header]
+        while i != header:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                self.size[self.column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(self, header):
+        left, right, up, down = self.left, self.right, self.up, self.down
+        i = up[header]
+        while i != header:
+            j = left[i]
+            while j != i:
+                self.size[self.column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[header]] = header
+        left[right[header]] = header
+
+    # Permanently select the row holding node. Returns False if one of its
+    # columns is already covered by an earlier selection.
+    def select(self, node):
+        j = node
+        while True:
+            header = self.column[j]
+            if self.right[self.left[header]] != header:
+                return False
+            self.cover(header)
+            j = self.right[j]
+            if j == node:
+                return True
+
+    # Algorithm X: yield each exact cover as a list holding the first node of
+    # every chosen row, choosing the column with the fewest rows at every level
+    def search(self, solver):
+        right, down, size = self.right, self.down, self.size
+        solution = []
+
+        def recurse():
+            solver.nodes += 1
+            solver.depth = len(solution)
+            if solver.cancelled or solver.deadline is not None:
+                solver.check_interrupt()
+            if right[0] == 0:
+                yield [self.row_start(node) for node in solution]
+                return  # Every column is covered
+            header, best = 0, None
+            col = right[0]
+            while col != 0:
+                if best is None or size[col] < best:
+                    header, best = col, size[col]
+                    if best <= 1:
+                        break
+                col = right[col]
+            self.cover(header)
+            node = down[header]
+            while node != header:
+                solution.append(node)
+                j = right[node]
+                while j != node:
+                    self.cover(self.column[j])
+                    j = right[j]
+                yield from recurse()
+                j = self.left[node]
+                while j != node:
+                    self.uncover(self.column[j])
+                    j = self.left[j]
+                solution.pop()
+                node = down[node]
+            self.uncover(header)
+
+        return recurse()
+
+    # First node of the row holding node, which identifies the row
+    def row_start(self, node):
+        while self.left[node] < node:
+            node = self.left[node]
+        return node
@@ -0,0 +1,187 @@
+import time
+
+# Phases of a CSP solve that SolveStats times, and the CSP method behind each
+PHASES = {
+    "ac3": "arc_consistency",
+    "selection": "select_unassigned_variable",
+    "ordering": "order_domain_values",
+    "consistency": "is_consistent",
+}
+# Entry points whose outermost call makes up one solve
+RUNS = ("solve", "backtracking_search", "iter_solutions", "count_solutions")
+
+
+class SolveStats:
+    # Counters and per-phase timings for the solves of one CSP. Attaching
+    # wraps the CSP's methods on that instance only, so a CSP without stats
+    # runs the plain class methods and pays nothing. hook, if given, is called
+    # with this object at the end of every solve, e.g. to export as_dict().
+    def __init__(self, hook=None):
+        self.hook = hook
+        self.running = 0  # Nesting depth of solve entry points
+        self.reset()
+
+    def reset(self):
+        self.arcs_checked = 0  # revise calls
+        self.arcs_revised = 0  # revise calls that pruned something
+        self.constraints_propagated = 0  # Typed constraint filtering passes
+        self.values_pruned = 0  # By arcs, forward checking and typed constraints
+        self.prunes = 0  # csp.prune calls, each one trail entry when trailed
+        self.nodes_expanded = 0
+        self.backtracks = 0  # Search nodes left after trying all their values
+        self.max_depth = 0  # Most variables assigned at once
+        self.timings = dict.fromkeys(PHASES, 0.0)  # Seconds per phase
+        self.total_time = 0.0
+
+    def as_dict(self):
+        return {
+            "arcs_checked": self.arcs_checked,
+            "arcs_revised": self.arcs_revised,
+            "constraints_propagated": self.constraints_propagated,
+            "values_pruned": self.values_pruned,
+            "nodes_expanded": self.nodes_expanded,
+            "backtracks": self.backtracks,
+            "max_depth": self.max_depth,
+            "timings": dict(self.timings),
+            "total_time": self.total_time,
+        }
+
+    # Install the instrumented methods on csp
+    def attach(self, csp):
+        for phase, name in PHASES.items():
+            setattr(csp, name, self.timed(phase, getattr(csp, name)))
+        for name in RUNS:
+            method = getattr(csp, name)
+            if name == "iter_solutions":
+                setattr(csp, name, self.run_generator(method))
+            else:
+                setattr(csp, name, self.run(method))
+        csp.revise = self.counted_revise(csp, csp.revise)
+        csp.propagate = self.counted_propagate(csp.propagate)
+        csp.prune = self.counted_prune(csp, csp.prune)
+        csp.infer = self.counted_infer(csp.infer)
+        csp.search = self.counted_search(csp.search)
+
+    # Restore the plain class methods on csp
+    @staticmethod
+    def detach(csp):
+        for name in (
+            *PHASES.values(),
+            *RUNS,
+            "revise",
+            "propagate",
+            "prune",
+            "infer",
+            "search",
+        ):
+            csp.__dict__.pop(name, None)
+
+    # Called around the outermost solve entry point: reset on the way in,
+    # report on the way out
+    def begin(self):
+        if not self.running:
+            self.reset()
+            self.started = time.perf_counter()
+        self.running += 1
+
+    def end(self):
+        self.running -= 1
+        if not self.running:
+            self.total_time = time.perf_counter() - self.started
+            if self.hook is not None:
+                self.hook(self)
+
+    def run(self, method):
+        def wrapper(*args, **kwargs):
+            self.begin()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.end()
+
+        return wrapper
+
+    def run_generator(self, method):
+        def wrapper(*args, **kwargs):
+            self.begin()
+            try:
+                yield from method(*args, **kwargs)
+            finally:
+                self.end()  # Also reached when the caller stops early
+
+        return wrapper
+
+    def timed(self, phase, method):
+        def wrapper(*args, **kwargs):
+            start_time = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.timings[phase] += time.perf_counter() - start_time
+
+        return wrapper
+
+    def counted_revise(self, csp, method):
+        def wrapper(constraint, trail=None):
+            before = csp.domains.size(constraint[0])
+            revised = method(constraint, trail)
+            self.arcs_checked += 1
+            if revised:
+                self.arcs_revised += 1
+                self.values_pruned += before - csp.domains.size(constraint[0])
+            return revised
+
+        return wrapper
+
+    def counted_propagate(self, method):
+        def wrapper(constraint, trail=None):
+            self.constraints_propagated += 1
+            return method(constraint, trail)
+
+        return wrapper
+
+    # A typed constraint's prune can remove several values at once, so count
+    # what its domain lost
+    def counted_prune(self, csp, method):
+        def wrapper(var, values, trail=None):
+            before = csp.domains.size(var)
+            consistent = method(var, values, trail)
+            self.prunes += 1
+            self.values_pruned += before - csp.domains.size(var)
+            return consistent
+
+        return wrapper
+
+    def counted_infer(self, method):
+        def wrapper(var, value, assignment, inference, trail):
+            mark, prunes = len(trail), self.prunes
+            consistent = method(var, value, assignment, inference, trail)
+            if inference == "forward_checking":
+                # After var's own snapshot, each trail entry not made by a
+                # prune is one value removed from a neighbor; prunes and MAC
+                # revisions count themselves
+                entries = len(trail) - mark - 1 - (self.prunes - prunes)
+                self.values_pruned += max(entries, 0)
+            return consistent
+
+        return wrapper
+
+    # Instrument each Search the CSP creates: its expand and retreat steps
+    def counted_search(self, method):
+        def wrapper(*args, **kwargs):
+            search = method(*args, **kwargs)
+            expand, retreat = search.expand, search.retreat
+
+            def counted_expand():
+                self.nodes_expanded += 1
+                self.max_depth = max(self.max_depth, len(search.assignment))
+                return expand()
+
+            def counted_retreat():
+                self.backtracks += 1
+                retreat()
+
+            search.expand, search.retreat = counted_expand, counted_retreat
+            return search
+
+        return wrapper
@@ -0,0 +1,156 @@
+import math
+from collections import namedtuple
+from functools import lru_cache
+from CSP import CSP
+from Constraints import AllDifferent, Constraint
+
+# Structure of an n x n Sudoku with box x box boxes (n = box * box). Cells are
+# numbered 0..n*n-1 row by row; units lists the rows, then the columns, then
+# the boxes as cell numbers, and unit_indexes_of gives the indexes in units of
+# the row, column and box of every cell.
+Geometry = namedtuple(
+    "Geometry",
+    ["box", "size", "cells", "units", "units_of", "unit_indexes_of", "peers"],
+)
+
+# Symbols for the digits 1..25 in puzzle strings; "0" or "." is an empty cell
+SYMBOLS = "123456789ABCDEFGHIJKLMNOP"
+
+
+# Geometry of the Sudoku with the given box size, computed once per size
+@lru_cache(maxsize=None)
+def geometry(box=3):
+    size = box * box
+    cells = size * size
+    units = (
+        [[row * size + col for col in range(size)] for row in range(size)]
+        + [[row * size + col for row in range(size)] for col in range(size)]
+        + [
+            [(box_row + i) * size + box_col + j for i in range(box) for j in range(box)]
+            for box_row in range(0, size, box)
+            for box_col in range(0, size, box)
+        ]
+    )
+    unit_indexes_of = [[] for _ in range(cells)]
+    for index, unit in enumerate(units):
+        for cell in unit:
+            unit_indexes_of[cell].append(index)
+    units_of = [[units[index] for index in indexes] for indexes in unit_indexes_of]
+    peers = [
+        sorted({peer for unit in units_of[cell] for peer in unit} - {cell})
+        for cell in range(cells)
+    ]
+    return Geometry(box, size, cells, units, units_of, unit_indexes_of, peers)
+
+
+# Box size of an n x n grid; raises ValueError if n is not a square
+def box_of(grid):
+    box = math.isqrt(len(grid))
+    if box < 2 or box * box != len(grid):
+        raise ValueError(f"Not a Sudoku grid size: {len(grid)}")
+    return box
+
+
+# Convert a puzzle string (row by row, "0" or "." for empty cells) into a list
+# grid. The grid size follows from the length: 81 characters for 9x9, 256 for
+# 16x16, 625 for 25x25, with digits above 9 written as letters (see SYMBOLS).
+def puzzle_to_grid(puzzle):
+    puzzle = puzzle.strip().replace(".", "0").upper()
+    box = math.isqrt(math.isqrt(len(puzzle)))
+    size = box * box
+    if box < 2 or size * size != len(puzzle) or box > 5:
+        raise ValueError(f"Not a Sudoku puzzle: {puzzle!r}")
+    values = {symbol: digit for digit, symbol in enumerate("0" + SYMBOLS[:size])}
+    if not set(puzzle) <= values.keys():
+        raise ValueError(f"Not a Sudoku puzzle: {puzzle!r}")
+    return [
+        [values[puzzle[row * size + col]] for col in range(size)] for row in range(size)
+    ]
+
+
+# Convert a grid back into a puzzle string
+def grid_to_puzzle(grid):
+    symbols = "0" + SYMBOLS
+    return "".join(symbols[int(value)] for row in grid for value in row)
+
+
+class SudokuTemplate:
+    # Precomputed CSP model of an n x n Sudoku: (row, col) variables, the peer
+    # index and the "must differ" arcs (1,620 for 9x9). Every CSP handed out by
+    # csp() shares these read-only structures and only gets its own domains.
+    def __init__(self, box=3):
+        shape = geometry(box)
+        self.box = box
+        self.variables = [(i, j) for i in range(shape.size) for j in range(shape.size)]
+        self.units = [[self.variables[cell] for cell in unit] for unit in shape.units]
+        self.peers = {
+            self.variables[cell]: {self.variables[peer] for peer in shape.peers[cell]}
+            for cell in range(shape.cells)
+        }
+        self.constraints = [
+            (self.variables[cell], self.variables[peer])
+            for cell in range(shape.cells)
+            for peer in shape.peers[cell]
+        ]
+        self.full_domain = list(range(1, shape.size + 1))
+
+    # Domains for a grid (0 for empty cells). Unfilled cells all share one list,
+    # which is safe because domain stores replace lists instead of mutating them.
+    def domains(self, grid=None):
+        domains = dict.fromkeys(self.variables, self.full_domain)
+        if grid is not None:
+            for i, j in self.variables:
+                if grid[i][j] != 0:
+                    domains[(i, j)] = [int(grid[i][j])]
+        return domains
+
+    # A fresh CSP for grid with the givens applied. model is one of MODELS;
+    # extra adds typed constraints for variants, such as AllDifferent on the
+    # diagonals or Sum cages for Killer Sudoku.
+    def csp(self, grid=None, domain_store="list", model="arcs", extra=(), **options):
+        if model == "arcs":
+            constraints, neighbors = self.constraints, self.peers
+        elif model == "units":
+            # Fresh objects: typed constraints keep per-CSP filtering state
+            constraints = [AllDifferent(unit) for unit in self.units]
+            neighbors = {var: set() for var in self.variables}
+        else:
+            raise ValueError(f"Unknown Sudoku model: {model}")
+        if extra:
+            constraints = constraints + list(extra)
+            if not all(isinstance(c, Constraint) for c in extra):
+                neighbors = None  # Extra arcs: index the whole graph again
+        return CSP(
+            variables=self.variables,
+            domains=self.domains(grid),
+            constraints=constraints,
+            domain_store=domain_store,
+            neighbors=neighbors,
+            **options,
+        )
+
+    # The two main diagonals, which diagonal (X) Sudoku also makes units
+    def diagonals(self):
+        size = self.box * self.box
+        return [
+            [(i, i) for i in range(size)],
+            [(i, size - 1 - i) for i in range(size)],
+        ]
+
+
+# Ways SudokuTemplate.csp can state the Sudoku rules: "arcs" as pairwise
+# "must differ" arcs, "units" as one AllDifferent per row, column and box
+MODELS = ("arcs", "units")
+
+
+# Shared template per box size, built on first use
+@lru_cache(maxsize=None)
+def sudoku_template(box=3):
+    return SudokuTemplate(box)
+
+
+# Build a Sudoku CSP for grid from the shared template of its size (9x9 when
+# no grid is given)
+def sudoku_csp(grid=None, domain_store="list", **options):
+    box = 3 if grid is None else box_of(grid)
+    return sudoku_template(box).csp(grid, domain_store, **options)
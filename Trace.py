@@ -0,0 +1,72 @@
+import gzip
+import json
+from collections import deque
+
+
+class ArcTrace:
+    # Opt-in record of the revisions made by CSP.revise, for explaining a solve
+    # after the fact. Only the latest `capacity` records are kept (a ring
+    # buffer), and with sample_every=n only every n-th revision is recorded,
+    # so a long solve cannot grow the trace without bound.
+    def __init__(self, capacity=10000, sample_every=1):
+        if capacity < 1 or sample_every < 1:
+            raise ValueError("capacity and sample_every must be at least 1")
+        self.sample_every = sample_every
+        self.records = deque(maxlen=capacity)
+        self.revisions = 0  # Revisions seen, recorded or not
+
+    # Called by CSP.revise after it pruned var_i's domain against var_j
+    def record(self, var_i, var_j, domain):
+        self.revisions += 1
+        if self.revisions % self.sample_every == 0:
+            self.records.append((self.revisions, var_i, var_j, list(domain)))
+
+    # Latest revised domain of each arc still in the buffer, as
+    # {var_i: {var_j: domain}}
+    def arc_trees(self):
+        trees = {}
+        for _, var_i, var_j, domain in self.records:
+            trees.setdefault(var_i, {})[var_j] = domain
+        return trees
+
+    # JSON-ready form; tuple variables such as Sudoku cells become lists
+    def as_dict(self):
+        return {
+            "revisions": self.revisions,
+            "sample_every": self.sample_every,
+            "capacity": self.records.maxlen,
+            "records": [
+                [sequence, encode_variable(var_i), encode_variable(var_j), domain]
+                for sequence, var_i, var_j, domain in self.records
+            ],
+        }
+
+    def to_json(self):
+        return json.dumps(self.as_dict(), separators=(",", ":"))
+
+    # Write the trace as JSON; ".gz" paths are gzip compressed
+    def dump(self, path):
+        opener = gzip.open if str(path).endswith(".gz") else open
+        with opener(path, "wt") as target:
+            target.write(self.to_json())
+
+    @classmethod
+    def load(cls, path):
+        opener = gzip.open if str(path).endswith(".gz") else open
+        with opener(path, "rt") as source:
+            data = json.load(source)
+        trace = cls(data["capacity"], data["sample_every"])
+        trace.revisions = data["revisions"]
+        for sequence, var_i, var_j, domain in data["records"]:
+            trace.records.append(
+                (sequence, decode_variable(var_i), decode_variable(var_j), domain)
+            )
+        return trace
+
+
+def encode_variable(variable):
+    return list(variable) if isinstance(variable, tuple) else variable
+
+
+def decode_variable(variable):
+    return tuple(variable) if isinstance(variable, list) else variable
@@ -0,0 +1,70 @@
+import math
+
+# NumPy is imported inside the functions that use it, so importing this
+# module does not load it
+
+
+# Split (N, n, n) grids into (N, n, n) arrays whose second axis walks the units
+# (rows, columns or boxes) and third axis the cells of each unit
+def units_view(grids, kind):
+    count, size = grids.shape[0], grids.shape[1]
+    if kind == "row":
+        return grids
+    if kind == "col":
+        return grids.transpose(0, 2, 1)
+    box = math.isqrt(size)
+    return (
+        grids.reshape(count, box, box, box, box)
+        .transpose(0, 1, 3, 2, 4)
+        .reshape(count, size, size)
+    )
+
+
+# For every grid, whether each digit appears at most once in every unit. The
+# digits of all units of all grids are counted in a single bincount over
+# (grid, unit, digit) keys.
+def units_conflict_free(grids):
+    import numpy as np
+
+    count, size = grids.shape[0], grids.shape[1]
+    conflict_free = np.ones(count, dtype=bool)
+    unit_ids = np.arange(count * size, dtype=np.int64).reshape(count, size, 1)
+    for kind in ("row", "col", "box"):
+        keys = unit_ids * (size + 1) + units_view(grids, kind)
+        counts = np.bincount(keys.ravel(), minlength=count * size * (size + 1))
+        counts = counts.reshape(count, size, size + 1)
+        # Column 0 counts empty cells, which may repeat freely
+        conflict_free &= (counts[:, :, 1:] <= 1).all(axis=(1, 2))
+    return conflict_free
+
+
+# Validate an (N, 9, 9) array of grids (0 for empty cells). Returns a boolean
+# array that is True where no row, column or box repeats a digit and every
+# value is in range; with complete=True grids must also have no empty cells.
+# Grids are processed in chunks to bound the size of the intermediate arrays.
+def validate_grids(grids, complete=False, chunk_size=65536):
+    import numpy as np
+
+    grids = np.asarray(grids)
+    if grids.ndim == 2:
+        grids = grids[np.newaxis]
+    size = grids.shape[-1]
+    if grids.ndim != 3 or grids.shape[1] != size or math.isqrt(size) ** 2 != size:
+        raise ValueError(f"Expected an (N, n, n) array of grids, got {grids.shape}")
+    valid = np.empty(grids.shape[0], dtype=bool)
+    for start in range(0, grids.shape[0], chunk_size):
+        chunk = grids[start : start + chunk_size].astype(np.int64)
+        cell_in_range = (chunk >= 0) & (chunk <= size)
+        # Out-of-range values are zeroed so they cannot corrupt other counts
+        ok = cell_in_range.all(axis=(1, 2)) & units_conflict_free(
+            np.where(cell_in_range, chunk, 0)
+        )
+        if complete:
+            ok &= (chunk != 0).all(axis=(1, 2))
+        valid[start : start + chunk_size] = ok
+    return valid
+
+
+# Single-grid convenience wrapper around validate_grids
+def is_valid_grid(grid, complete=False):
+    return bool(validate_grids(grid, complete)[0])
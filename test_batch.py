@@ -0,0 +1,34 @@
+from Batch import solve_many
+
+PUZZLES = [
+    "530070000600195000098000060800060003400803001700020006060000280000419005000080079",
+    "12345xyz",
+    "003020600900305001001806400008102900700000008006708200002609500800203009005010300",
+]
+
+
+# A malformed line gets a result carrying its error; the rest still solve
+def test_bad_line_does_not_abort_run():
+    for workers in (0, 2):
+        results = list(solve_many(PUZZLES, workers, chunksize=2))
+        assert [result.index for result in results] == [0, 1, 2]
+        assert results[1].solution is None and results[1].error
+        assert results[0].solution and results[2].solution
+        assert results[0].error is None and results[2].error is None
+
+
+# Results held back behind a slow first chunk count toward the read-ahead
+# window, so the input is never read far ahead of the output
+def test_ordered_read_ahead_is_bounded():
+    hard = "000000010400000000020000000000050407008000300001090000300400200050100000000806000"
+    read = []
+
+    def puzzles():
+        yield hard
+        while True:
+            read.append(1)
+            yield PUZZLES[0]
+
+    results = solve_many(puzzles(), 2, chunksize=5, solver="csp")
+    assert next(results).index == 0
+    assert len(read) < 2 * 2 * 5
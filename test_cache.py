@@ -0,0 +1,53 @@
+import random
+from Cache import SolutionCache, Transform, apply_transform, canonical_form
+from Solver import SudokuSolver
+from Template import puzzle_to_grid
+from Validator import is_valid_grid
+
+PUZZLE = (
+    "000000010400000000020000000000050407008000300001090000300400200050100000000806000"
+)
+
+
+def random_variant(grid, rng):
+    rows = [
+        3 * band + r
+        for band in rng.sample(range(3), 3)
+        for r in rng.sample(range(3), 3)
+    ]
+    cols = [
+        3 * stack + c
+        for stack in rng.sample(range(3), 3)
+        for c in rng.sample(range(3), 3)
+    ]
+    labels = dict(zip(range(1, 10), rng.sample(range(1, 10), 9)))
+    return apply_transform(grid, Transform(rng.random() < 0.5, rows, cols, labels))
+
+
+# Symmetric variants share a canonical form and are answered from the cache
+# with a solution mapped back into their own frame
+def test_symmetric_variant_round_trip():
+    rng = random.Random(0)
+    grid = puzzle_to_grid(PUZZLE)
+    solver = SudokuSolver()
+    solves = []
+
+    def solve(puzzle):
+        solves.append(puzzle)
+        return solver.solve(puzzle)
+
+    cache = SolutionCache()
+    assert cache.solve(grid, solve) is not None
+    key = canonical_form(grid)[0]
+    for _ in range(20):
+        variant = random_variant(grid, rng)
+        assert canonical_form(variant)[0] == key
+        solution = cache.solve(variant, solve)
+        assert is_valid_grid(solution)
+        assert all(value for row in solution for value in row)
+        for row, solved_row in zip(variant, solution):
+            assert all(
+                not given or given == value for given, value in zip(row, solved_row)
+            )
+    assert len(solves) == 1
+    assert cache.hits == 20
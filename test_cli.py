@@ -0,0 +1,30 @@
+from CLI import main
+
+PUZZLE = (
+    "530070000600195000098000060800060003400803001700020006060000280000419005000080079"
+)
+
+
+def test_solve_writes_every_line(tmp_path):
+    output = tmp_path / "out.txt"
+    assert main(["solve", PUZZLE, "bad", "-o", str(output)]) == 1
+    lines = output.read_text().splitlines()
+    assert len(lines) == 2 and len(lines[0]) == 81 and "0" not in lines[0]
+    assert lines[1] == "invalid"
+
+
+def test_validate_in_chunks(tmp_path):
+    output = tmp_path / "out.txt"
+    clash = "55" + PUZZLE[2:]
+    puzzles = [PUZZLE, clash, "bad", PUZZLE, PUZZLE]
+    assert main(["validate", *puzzles, "--chunksize", "2", "-o", str(output)]) == 1
+    assert output.read_text().split() == [
+        "valid",
+        "invalid",
+        "invalid",
+        "valid",
+        "valid",
+    ]
+    assert (
+        main(["validate", PUZZLE, PUZZLE, "--chunksize", "1", "-o", str(output)]) == 0
+    )
@@ -0,0 +1,85 @@
+import random
+from itertools import product
+from Constraints import AllDifferent, Binary, Sum
+from CSP import CSP
+
+
+def random_domains(rng, variables, values=range(1, 6)):
+    return {
+        var: sorted(rng.sample(values, rng.randint(1, len(values))))
+        for var in variables
+    }
+
+
+# Values of each variable that appear in some assignment satisfying holds,
+# or None when there is no such assignment
+def supported_values(domains, holds):
+    variables = list(domains)
+    supported = {var: set() for var in variables}
+    for values in product(*(domains[var] for var in variables)):
+        if holds(values):
+            for var, value in zip(variables, values):
+                supported[var].add(value)
+    if not supported[variables[0]]:
+        return None
+    return supported
+
+
+def propagated(constraint, domains):
+    csp = CSP(
+        list(domains),
+        {var: list(values) for var, values in domains.items()},
+        [constraint],
+    )
+    if constraint.propagate(csp) is None:
+        return None
+    return {var: set(csp.domains[var]) for var in domains}
+
+
+# Regin filtering keeps exactly the values some solution uses
+def test_all_different_matches_brute_force():
+    rng = random.Random(0)
+    for _ in range(500):
+        variables = list(range(rng.randint(2, 5)))
+        domains = random_domains(rng, variables)
+        expected = supported_values(
+            domains, lambda values: len(set(values)) == len(values)
+        )
+        assert propagated(AllDifferent(variables), domains) == expected
+
+
+# Arc consistency on any relation keeps exactly the supported values
+def test_binary_matches_brute_force():
+    rng = random.Random(1)
+    relations = [
+        lambda a, b: a < b,
+        lambda a, b: abs(a - b) == 1,
+        lambda a, b: (a + b) % 3 == 0,
+    ]
+    for _ in range(500):
+        domains = random_domains(rng, ["x", "y"])
+        predicate = rng.choice(relations)
+        expected = supported_values(domains, lambda values: predicate(*values))
+        assert propagated(Binary("x", "y", predicate), domains) == expected
+
+
+# Bounds propagation never drops a value some solution uses, and keeps only
+# values inside the bounds the rest of the scope allows
+def test_sum_is_sound():
+    rng = random.Random(2)
+    for _ in range(500):
+        variables = list(range(rng.randint(2, 4)))
+        domains = random_domains(rng, variables)
+        total = rng.randint(len(variables), 5 * len(variables))
+        expected = supported_values(domains, lambda values: sum(values) == total)
+        result = propagated(Sum(variables, total), domains)
+        if result is None:
+            assert expected is None
+            continue
+        if expected is not None:
+            for var in variables:
+                assert expected[var] <= result[var]
+        for var in variables:
+            rest_low = sum(min(result[other]) for other in variables if other != var)
+            rest_high = sum(max(result[other]) for other in variables if other != var)
+            assert all(total - rest_high <= v <= total - rest_low for v in result[var])
@@ -0,0 +1,28 @@
+from Template import sudoku_csp
+
+# Empty board except for the last row: many solutions
+OPEN_BOARD = [[0] * 9 for _ in range(8)] + [list(range(1, 10))]
+
+
+# A search that stops at a solution must leave the domains as it found them,
+# so solving the same CSP again gives the same answers
+def test_resolve_same_instance():
+    for inference in ("none", "forward_checking", "mac"):
+        csp = sudoku_csp(OPEN_BOARD)
+        assert csp.count_solutions(limit=5) == 5
+        first = csp.solve(inference=inference)
+        assert first is not None
+        assert csp.count_solutions(limit=5) == 5
+        assert csp.solve(inference=inference) == first
+        assert csp.count_solutions(limit=5, inference=inference) == 5
+
+
+def test_closed_search_restores_domains():
+    csp = sudoku_csp(OPEN_BOARD)
+    assert csp.arc_consistency()
+    domains = {var: list(csp.domains[var]) for var in csp.variables}
+    search = csp.search(inference="mac")
+    search.run(max_steps=20)
+    search.close()
+    assert search.done
+    assert {var: list(csp.domains[var]) for var in csp.variables} == domains
@@ -0,0 +1,92 @@
+import pytest
+from Grader import DIFFICULTY_OF, SudokuGrader
+from Template import puzzle_to_grid
+
+# Puzzles whose hardest needed technique is known
+PUZZLES = {
+    "naked_single": "007000009305700000000000002003207600008300000000600000400050100020486500000000008",
+    "hidden_single": "000000934900020070000300100000070090203100000000000600000090060009007008001400500",
+    "locked_candidates": "900350060054070091000000340100030000005600010008002000010500700876010030000000000",
+    "naked_pair": "090004000020007605300090480000000013000050000042030900000000000170900040005042007",
+    "hidden_pair": "680000100507030604000004970060070000700000000012640090001000000000005230900200006",
+    "x_wing": "104300007900600000000080090000045003000000180002000004015703800620010000007000000",
+    "backtracking": "000000098004680700000001205000000000130540006008007000700004000500800003096010020",
+}
+
+
+@pytest.mark.parametrize("technique", PUZZLES)
+def test_grade(technique):
+    grade = SudokuGrader().grade(puzzle_to_grid(PUZZLES[technique]))
+    assert grade.technique == technique
+    assert grade.difficulty == DIFFICULTY_OF[technique]
+
+
+def test_contradictory_givens_are_expert():
+    grid = puzzle_to_grid(PUZZLES["naked_single"])
+    grid[0][0] = grid[0][2]
+    assert SudokuGrader().grade(grid).difficulty == "expert"
+
+
+# A grader on an empty 9x9 board (every candidate open), whose candidates a
+# test then narrows by hand
+def open_grader():
+    grader = SudokuGrader()
+    grader.hardest_technique([[0] * 9 for _ in range(9)])
+    return grader
+
+
+def remove(grader, digit, cells):
+    for row, col in cells:
+        grader.candidates[row * 9 + col] &= ~(1 << digit)
+
+
+def has(grader, row, col, digit):
+    return bool(grader.candidates[row * 9 + col] >> digit & 1)
+
+
+# Pointing: 4 only in row 0 of box 0 leaves the rest of row 0
+def test_locked_candidates():
+    grader = open_grader()
+    remove(grader, 4, [(row, col) for row in (1, 2) for col in range(3)])
+    assert grader.locked_candidates()
+    assert not any(has(grader, 0, col, 4) for col in range(3, 9))
+    assert has(grader, 0, 0, 4) and has(grader, 3, 0, 4)
+
+
+def test_naked_pair():
+    grader = open_grader()
+    grader.candidates[0] = grader.candidates[1] = (1 << 1) | (1 << 2)
+    assert grader.naked_pair()
+    assert not any(
+        has(grader, 0, col, 1) or has(grader, 0, col, 2) for col in range(2, 9)
+    )
+    assert has(grader, 1, 2, 1)
+
+
+def test_hidden_pair():
+    grader = open_grader()
+    remove(grader, 1, [(0, col) for col in range(2, 9)])
+    remove(grader, 2, [(0, col) for col in range(2, 9)])
+    assert grader.hidden_pair()
+    assert grader.candidates[0] == grader.candidates[1] == (1 << 1) | (1 << 2)
+
+
+# 3 only in columns 0 and 8 of rows 2 and 5 leaves the rest of both columns
+def test_x_wing():
+    grader = open_grader()
+    for row in (2, 5):
+        remove(grader, 3, [(row, col) for col in range(1, 8)])
+    assert grader.x_wing()
+    assert not has(grader, 0, 0, 3) and not has(grader, 8, 8, 3)
+    assert has(grader, 2, 0, 3) and has(grader, 5, 8, 3) and has(grader, 0, 1, 3)
+
+
+# 5 only in columns 1, 4 and 7 of rows 0, 3 and 6, two places a row
+def test_swordfish():
+    grader = open_grader()
+    for row, cols in ((0, (1, 4)), (3, (4, 7)), (6, (1, 7))):
+        remove(grader, 5, [(row, col) for col in range(9) if col not in cols])
+    assert not grader.x_wing()
+    assert grader.swordfish()
+    assert not any(has(grader, row, col, 5) for row in (1, 8) for col in (1, 4, 7))
+    assert has(grader, 0, 1, 5) and has(grader, 3, 7, 5) and has(grader, 1, 0, 5)
@@ -0,0 +1,14 @@
+from Pool import PuzzlePool
+
+
+# A dry pool never generates on the caller's thread: a plain pop returns None
+# and a waiting pop is served by the refill thread
+def test_dry_pop_waits_for_worker(tmp_path):
+    pool = PuzzlePool(path=str(tmp_path / "pool.sqlite3"), size=1, seed=1)
+    assert pool.pop("easy") is None
+    pool.start()
+    try:
+        grid = pool.pop("easy", timeout=60)
+        assert grid is not None and grid.shape == (9, 9)
+    finally:
+        pool.stop()
@@ -0,0 +1,12 @@
+from PuzzleIO import PuzzleIndex, read_puzzles
+
+
+# PuzzleIndex numbers puzzles the way read_puzzles yields them
+def test_index_skips_blank_and_comment_lines(tmp_path):
+    path = tmp_path / "puzzles.txt"
+    path.write_text("# header\n\nfirst\n  \n# note\nsecond\nthird")
+    puzzles = list(read_puzzles(str(path)))
+    assert puzzles == ["first", "second", "third"]
+    with PuzzleIndex(str(path)) as index:
+        assert len(index) == len(puzzles)
+        assert [index[i] for i in range(len(index))] == puzzles
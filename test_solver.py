@@ -0,0 +1,98 @@
+import pytest
+from Solver import BACKENDS, SudokuSolver
+from Template import puzzle_to_grid
+
+UNIQUE = (
+    "530070000600195000098000060800060003400803001700020006060000280000419005000080079"
+)
+SOLUTION = (
+    "534678912672195348198342567859761423426853791713924856961537284287419635345286179"
+)
+# UNIQUE with its first two givens taken out: exactly two solutions
+AMBIGUOUS = (
+    "000070000600195000098000060800060003400803001700020006060000280000419005000080079"
+)
+# Two 5s in the first row
+CONTRADICTORY = (
+    "550070000600195000098000060800060003400803001700020006060000280000419005000080079"
+)
+
+SOLVER_BACKENDS = [backend for backend in BACKENDS if backend != "auto"]
+
+
+def is_solution(grid, solution):
+    size = len(grid)
+    box = int(size**0.5)
+    digits = set(range(1, size + 1))
+    for i in range(size):
+        if set(solution[i]) != digits or {row[i] for row in solution} != digits:
+            return False
+    for top in range(0, size, box):
+        for left in range(0, size, box):
+            cells = {
+                solution[top + i][left + j] for i in range(box) for j in range(box)
+            }
+            if cells != digits:
+                return False
+    return all(
+        not given or given == value
+        for row, solved_row in zip(grid, solution)
+        for given, value in zip(row, solved_row)
+    )
+
+
+@pytest.mark.parametrize("backend", SOLVER_BACKENDS)
+def test_unique_puzzle(backend):
+    solver = SudokuSolver(backend)
+    assert solver.solve(puzzle_to_grid(UNIQUE)) == puzzle_to_grid(SOLUTION)
+    assert solver.count_solutions(puzzle_to_grid(UNIQUE), limit=5) == 1
+
+
+@pytest.mark.parametrize("backend", SOLVER_BACKENDS)
+def test_ambiguous_puzzle(backend):
+    solver = SudokuSolver(backend)
+    grid = puzzle_to_grid(AMBIGUOUS)
+    assert is_solution(grid, solver.solve(grid))
+    assert solver.count_solutions(grid, limit=2) == 2
+    solutions = list(solver.iter_solutions(grid))
+    assert len(solutions) == len({str(solution) for solution in solutions}) == 2
+    assert all(is_solution(grid, solution) for solution in solutions)
+
+
+@pytest.mark.parametrize("backend", SOLVER_BACKENDS)
+def test_contradictory_givens(backend):
+    solver = SudokuSolver(backend)
+    assert solver.solve(puzzle_to_grid(CONTRADICTORY)) is None
+    assert solver.count_solutions(puzzle_to_grid(CONTRADICTORY)) == 0
+
+
+# Ruling out the only solution's digit in one cell leaves nothing
+@pytest.mark.parametrize("backend", SOLVER_BACKENDS)
+def test_excluded(backend):
+    solver = SudokuSolver(backend)
+    grid = puzzle_to_grid(UNIQUE)
+    assert solver.solve(grid, excluded=[(0, 2, 4)]) is None
+    assert solver.solve(grid, excluded=[(0, 2, 1)]) == puzzle_to_grid(SOLUTION)
+    ambiguous = puzzle_to_grid(AMBIGUOUS)
+    first = solver.solve(ambiguous)
+    other = solver.solve(ambiguous, excluded=[(0, 0, first[0][0])])
+    assert is_solution(ambiguous, other) and other[0][0] != first[0][0]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_16x16(backend):
+    # A complete grid from the shifted-rows pattern, with every other cell of
+    # every other row cleared
+    box, size = 4, 16
+    full = [
+        [(box * (r % box) + r // box + c) % size + 1 for c in range(size)]
+        for r in range(size)
+    ]
+    grid = [
+        [0 if r % 2 == 0 and c % 2 == 0 else full[r][c] for c in range(size)]
+        for r in range(size)
+    ]
+    solver = SudokuSolver(backend)
+    solution = solver.solve(grid)
+    assert is_solution(grid, solution)
+    assert solver.count_solutions(grid, limit=2) >= 1
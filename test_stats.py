@@ -0,0 +1,17 @@
+from Stats import SolveStats
+from Template import puzzle_to_grid, sudoku_template
+
+PUZZLE = (
+    "000000010400000000020000000000050407008000300001090000300400200050100000000806000"
+)
+
+
+# Typed constraints prune through csp.prune, which must be counted too
+def test_units_model_counts_pruning():
+    grid = puzzle_to_grid(PUZZLE)
+    for inference in ("forward_checking", "mac"):
+        stats = SolveStats()
+        csp = sudoku_template().csp(grid, model="units", stats=stats)
+        assert csp.solve(inference=inference) is not None
+        assert stats.constraints_propagated > 0
+        assert stats.values_pruned > 0